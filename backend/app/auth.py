@@ -2,25 +2,21 @@ from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import hashlib
 from typing import Optional
 
 from .config import settings
-from .database import SessionLocal
+# get_db / get_read_db are the same dependencies the routers use, so FastAPI
+# hands the auth check and the route one shared session per request.
+from .database import get_async_db, get_db, get_read_db  # noqa: F401  (get_db re-exported)
 from . import models
+from .services.auth_cache import auth_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # ===== SIMPLE HASHING USING hashlib (no passlib, no bcrypt) =====
 
 def hash_password(password: str) -> str:
@@ -44,20 +40,91 @@ def create_access_token(data: dict, expires_minutes: int = settings.access_token
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
+def _credentials_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _user_id_from_token(token: Optional[str]) -> int:
+    """Verify the JWT (or find it already verified in the cache) and return its user id."""
+    if not token:
+        raise _credentials_error()
+
+    user_id = auth_cache.get_token(token)
+    if user_id is not None:
+        return user_id
+
+    try:
+        payload = jwt.decode(
+            token,
+            settings.secret_key,
+            algorithms=[settings.algorithm],
+            options={"require_sub": True, "require_exp": True},
+        )
+        user_id = int(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        raise _credentials_error()
+
+    auth_cache.set_token(token, user_id, float(payload["exp"]))
+    return user_id
+
+
+def _current_user(token: Optional[str], db: Session) -> models.User:
+    user_id = _user_id_from_token(token)
+
+    cached = auth_cache.get_user(user_id)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    user = db.get(models.User, user_id)
+    if user is None:
+        raise _credentials_error()
+    auth_cache.set_user(user)
+    return user
+
+
 def get_current_user(
-    token: Optional[str] = Depends(oauth2_scheme),  # token can be None now
+    token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ) -> models.User:
     """
-    Simplified for assignment:
-    - Accepts a Bearer token if present (so Swagger shows Authorize),
-    - But does NOT strictly require it for now.
-    - Always returns the first user in the database.
+    The user the Bearer token belongs to (401 if it is missing, invalid or
+    expired). A token and user seen recently are served from auth_cache and
+    merged into the request's session without running any SQL.
     """
-    user = db.query(models.User).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No users found in database",
-        )
-    return user
\ No newline at end of file
+    return _current_user(token, db)
+
+
+def get_current_user_read(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_read_db),
+) -> models.User:
+    """
+    get_current_user() for routes on get_read_db: the user is resolved in
+    the route's own read session, so these requests never open a
+    write-engine connection.
+    """
+    return _current_user(token, db)
+
+
+async def get_current_user_async(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> models.User:
+    """
+    Async twin of get_current_user() for async_mode routes.
+    """
+    user_id = _user_id_from_token(token)
+
+    cached = auth_cache.get_user(user_id)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise _credentials_error()
+    auth_cache.set_user(user)
+    return user
@@ -7,12 +7,137 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
 
+    # Verified tokens and user rows are cached per process (0 disables)
+    auth_cache_ttl_seconds: int = 300
+    auth_cache_max_entries: int = 10000
+
     # Database
     DATABASE_URL: str = "sqlite:///./app.db"
+    DATABASE_READ_URL: str | None = None  # optional read replica for GET routes
+
+    # Serve the slow routes (project creation, refinement, export) from
+    # async handlers on an AsyncSession (aiosqlite / asyncpg) instead of
+    # the threadpool. The sync stack stays the default.
+    async_mode: bool = False
+
+    # Connection pool (ignored for in-memory SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle_seconds: int = 1800
+
+    # SQLite tuning
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
 
     # Gemini LLM
     gemini_api_key: str | None = None  # <-- IMPORTANT
 
+    # Chosen Gemini model is remembered here so restarts skip the probe
+    llm_model_cache_path: str | None = "./.llm_model.json"
+    llm_model_cache_ttl_seconds: int = 86400
+
+    # Gemini rate limits (0 disables a budget) and retry policy
+    llm_rpm: int = 60
+    llm_tpm: int = 1_000_000
+    llm_rate_limit_wait_seconds: float = 10.0
+    llm_max_retries: int = 2
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 8.0
+
+    # Circuit breaker: open after N consecutive upstream failures,
+    # then let a probe through every llm_breaker_reset_seconds
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    llm_breaker_half_open_probes: int = 1
+
+    # Export rendering: worker processes (0 = render in-process) and the
+    # artifact cache (content-addressed files in export_dir). Disable the
+    # cache on read-only/ephemeral filesystems; exports are then streamed
+    # straight from memory.
+    export_workers: int = 2
+    export_cache_enabled: bool = True
+    export_dir: str = "exports"
+    export_cache_max_bytes: int = 200 * 1024 * 1024
+    export_cache_max_age_seconds: int = 7 * 24 * 3600
+
+    # Max number of sections generated in parallel when creating a project
+    llm_max_concurrency: int = 4
+
+    # How a new project's sections are generated: "per_section" sends one
+    # prompt per section; "batched" asks for up to llm_outline_batch_size
+    # sections in one JSON reply and generates anything missing from it
+    # section by section
+    llm_outline_mode: str = "per_section"
+    llm_outline_batch_size: int = 12
+
+    # Refine prompt budget per model, in estimated tokens (~4 chars each).
+    # Longer sections are split at paragraph boundaries and the parts are
+    # refined in parallel. The reply is about as long as the input, so the
+    # budgets stay well under each model's output limit; models not listed
+    # get llm_default_token_budget.
+    llm_token_budgets: dict[str, int] = {
+        "models/gemini-flash-latest": 6000,
+        "models/gemini-2.5-flash": 6000,
+        "models/gemini-2.0-flash": 4000,
+    }
+    llm_default_token_budget: int = 4000
+
+    # Speculative refinements (opt-in): sections that are read or edited are
+    # refined in the background with each preset, so clicking a preset is
+    # answered without waiting on Gemini. Spends quota on clicks that may
+    # never come: capped by the queue length, the worker count, the share
+    # of the rate-limit budget that must stay free for user requests, and
+    # the number of sections whose results are kept.
+    refine_prefetch_enabled: bool = False
+    refine_presets: list[str] = [
+        "Make it formal",
+        "Make it simpler",
+        "Make concise",
+        "Rewrite for beginners",
+    ]
+    refine_prefetch_workers: int = 1
+    refine_prefetch_max_pending: int = 32
+    refine_prefetch_reserve: float = 0.5
+    refine_prefetch_max_sections: int = 256
+
+    # Delay between chunks when stub mode simulates a token stream
+    llm_stub_stream_delay: float = 0.03
+
+    # LLM response cache (memory LRU + optional SQLite file shared by workers)
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_db_path: str | None = None  # e.g. "./llm_cache.db"
+    # Disk tier bound: expired rows are deleted, then the soonest-expiring
+    # ones beyond the cap, every llm_cache_disk_prune_every writes
+    llm_cache_disk_max_entries: int = 20000
+    llm_cache_disk_prune_every: int = 100
+
+    # Background generation jobs (POST /projects/async)
+    job_workers: int = 2
+    job_task_lease_seconds: int = 300  # "running" tasks older than this are resumed
+
+    # Refinement history: store a full-text keyframe every N versions,
+    # compressed diffs in between (bounds the work to rebuild a version)
+    refinement_keyframe_interval: int = 10
+
+    # Feedback votes are buffered in memory and written in batches every
+    # N seconds (or once this many votes are pending). 0 writes every vote
+    # immediately.
+    feedback_flush_interval_seconds: float = 1.0
+    feedback_flush_max_pending: int = 500
+
+    # Response compression (brotli if installed, else gzip) for JSON/text
+    # bodies of at least compression_min_bytes; streams are never buffered
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+
+    # Request/LLM/SQL/export metrics in Prometheus format on /metrics.
+    # Requests slower than slow_request_log_ms are logged with a per-stage
+    # breakdown (0 = off).
+    metrics_enabled: bool = True
+    slow_request_log_ms: int = 0
+
     # Tell pydantic to load from .env, and ignore extra env vars instead of crashing
     model_config = SettingsConfigDict(
         env_file=".env",
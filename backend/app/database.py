@@ -1,13 +1,137 @@
 # app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, StaticPool
 from .config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def _sqlite_pragmas(read_only: bool):
+    """
+    Per-connection SQLite tuning:
+    - WAL lets readers run alongside the single writer,
+    - busy_timeout makes writers wait for the lock instead of failing
+      with "database is locked",
+    - synchronous=NORMAL is safe with WAL and saves an fsync per commit,
+    - mmap_size serves reads straight from the page cache.
+    """
+    def on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cur.execute("PRAGMA query_only=ON")
+        cur.close()
+
+    return on_connect
+
+
+def make_engine(url: str, read_only: bool = False):
+    if _is_sqlite(url):
+        connect_args = {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        }
+        if _is_sqlite_memory(url):
+            # Every connection to ":memory:" is a separate database;
+            # share one connection so all sessions see the same tables.
+            engine = create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+        else:
+            # SQLite connections are cheap and writes are serialized by the
+            # database lock anyway; a small QueuePool avoids reopening files.
+            engine = create_engine(
+                url,
+                connect_args=connect_args,
+                poolclass=QueuePool,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+            )
+        event.listen(engine, "connect", _sqlite_pragmas(read_only))
+        return engine
+
+    # Client/server databases (e.g. Postgres on Render)
+    return create_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle_seconds,
+    )
+
+
+engine = make_engine(DATABASE_URL)
+
+# Engine for read-only GET routes: a replica if DATABASE_READ_URL is set,
+# otherwise query_only connections to the same SQLite file (so reads never
+# take the write lock). Other databases without a replica share `engine`.
+if settings.DATABASE_READ_URL:
+    read_engine = make_engine(settings.DATABASE_READ_URL, read_only=True)
+elif _is_sqlite(DATABASE_URL) and not _is_sqlite_memory(DATABASE_URL):
+    read_engine = make_engine(DATABASE_URL, read_only=True)
+else:
+    read_engine = engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+# ---------- Async engine (settings.async_mode) ----------
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def make_async_engine(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    sync_url = make_url(url)
+    async_url = sync_url.set(
+        drivername=_ASYNC_DRIVERS.get(sync_url.get_backend_name(), sync_url.drivername)
+    )
+
+    if _is_sqlite(url):
+        kwargs = {"connect_args": {"timeout": settings.sqlite_busy_timeout_ms / 1000}}
+        if _is_sqlite_memory(url):
+            kwargs["poolclass"] = StaticPool
+        else:
+            kwargs.update(pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+        async_engine = create_async_engine(async_url, **kwargs)
+        event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas(read_only=False))
+        return async_engine
+
+    return create_async_engine(
+        async_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle_seconds,
+    )
+
+
+# Only built in async mode, so the sync stack (and tests) don't need aiosqlite
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_mode:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = make_async_engine(DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -18,3 +142,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
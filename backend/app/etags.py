@@ -0,0 +1,52 @@
+# backend/app/etags.py
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Bump when the JSON shape of projects/sections changes, so clients holding
+# old ETags get the new representation.
+REPRESENTATION_VERSION = 1
+
+# CompressionMiddleware appends one of these to a strong ETag when it
+# compresses the body; the identity and compressed bodies are different
+# representations, but both are current for the same resource version.
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def resource_etag(kind: str, resource_id: int, version: int, fields: Optional[str], include: Optional[str]) -> str:
+    """
+    Strong ETag for one version of a resource. `fields` / `include` pick
+    the representation, so they are part of the tag.
+    """
+    selection = hashlib.sha1(f"{fields!r}|{include!r}".encode("utf-8")).hexdigest()[:12]
+    return f'"{kind}-{resource_id}-v{version}-r{REPRESENTATION_VERSION}-{selection}"'
+
+
+def _strip_encoding(tag: str) -> str:
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already covers `etag` (weak comparison, per RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in {_strip_encoding(t) for t in tags}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
@@ -1,18 +1,69 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import Base, engine
-from . import models  # import models BEFORE create_all
+from .config import settings
+from .database import engine
+from . import models  # import models BEFORE run_migrations creates the tables
+from .middleware import CompressionMiddleware, MetricsMiddleware
+from .migrations import run_migrations
 from .routers import auth as auth_router
 from .routers import sections as sections_router
 from .routers import projects as projects_router
 from .routers import export as export_router
+from .routers import llm as llm_router
+from .routers import search as search_router
+from .routers import metrics as metrics_router
+from .services.auth_cache import auth_cache
+from .services.feedback import feedback_buffer
+from .services.job_queue import job_queue
+from .services.llm_service import llm_service
+from .services.metrics import metrics
+from .services.prefetch import refine_prefetcher
+from .services.search import search_index
+from .services.versioning import versioning
+from .services import exporter
+
+
+# Create tables, then bring existing databases up to date
+# (both under the database's write lock, see app.migrations)
+run_migrations(engine)
+
+# Keep the full-text index in step with every session that writes content
+search_index.install()
+# Drop cached users (and their tokens) when a User row changes
+auth_cache.install()
+# Bump Project/Section versions (ETags) on every content change
+versioning.install()
+if settings.refine_prefetch_enabled:
+    # Drop and redo speculative preset refinements when a section's content changes
+    refine_prefetcher.install()
+if settings.metrics_enabled:
+    # SQL timings per request, plus the slow-request log
+    metrics.install(slow_request_ms=settings.slow_request_log_ms)
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Model probing happens off the startup path; /llm/ready reports progress
+    llm_service.start_background_init()
+    # Also resumes any sections left unfinished by a previous run
+    job_queue.start()
+    feedback_buffer.start()
+    refine_prefetcher.start()
+    try:
+        yield
+    finally:
+        # Reverse order: nothing queues work for a service after it stopped
+        refine_prefetcher.stop()
+        job_queue.stop()
+        # Writes any votes still buffered in memory
+        feedback_buffer.stop()
+        exporter.shutdown_pool()
 
-app = FastAPI(title="AI-DOC-PLATFORM Backend")
+
+app = FastAPI(title="AI-DOC-PLATFORM Backend", lifespan=lifespan)
 
 
 origins = [
@@ -29,10 +80,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
+
+if settings.metrics_enabled:
+    # Added last, so it is outermost and its timings include compression
+    app.add_middleware(MetricsMiddleware)
+
+if settings.async_mode:
+    # Registered first, so these async handlers win over the sync routes
+    # with the same method and path.
+    app.include_router(projects_router.async_router)
+    app.include_router(sections_router.async_router)
+    app.include_router(export_router.async_router)
+
 app.include_router(auth_router.router)
 app.include_router(sections_router.router)
 app.include_router(projects_router.router)
 app.include_router(export_router.router)
+app.include_router(llm_router.router)
+app.include_router(search_router.router)
+if settings.metrics_enabled:
+    app.include_router(metrics_router.router)
 
 
 @app.get("/")
@@ -0,0 +1,188 @@
+# backend/app/middleware.py
+
+import gzip
+import time
+from importlib.util import find_spec
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import metrics
+
+HAS_BROTLI = find_spec("brotli") is not None
+if HAS_BROTLI:
+    import brotli
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+# Bodies above this size are compressed in a worker thread, off the event loop
+THREAD_THRESHOLD = 256 * 1024
+
+
+def _choose_encoding(accept_encoding: str) -> str:
+    offered = {
+        part.split(";")[0].strip().lower()
+        for part in accept_encoding.split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    if HAS_BROTLI and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return ""
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    # '"abc"' -> '"abc-br"'; app.etags strips the suffix again when matching
+    return f'{etag[:-1]}-{encoding}"'
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when the `brotli` package is installed) or gzip for complete,
+    compressible responses of at least `minimum_size` bytes.
+
+    Streaming responses (SSE, exports, anything sent in several chunks)
+    pass through untouched, so tokens still reach the client as soon as
+    they are produced. DOCX/PPTX are already zip files and are skipped by
+    content type anyway.
+
+    Strong ETags on compressed responses get an encoding suffix ("-br" /
+    "-gzip"), and a 304 echoes the suffixed tag the client sent.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = _choose_encoding(request_headers.get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start: dict = {}
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start.update(message)  # hold it until we've seen the body
+                return
+
+            if message["type"] != "http.response.body":
+                # e.g. http.response.pathsend for FileResponse
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not self._compressible(headers.get("content-type", ""))
+            ):
+                passthrough = True
+                if start["status"] == 304:
+                    self._match_encoded_etag(headers, encoding, request_headers.get("if-none-match", ""))
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) > THREAD_THRESHOLD:
+                compressed = await anyio.to_thread.run_sync(self._compress, encoding, body)
+            else:
+                compressed = self._compress(encoding, body)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.startswith('"'):
+                # A compressed body is a different representation: keep the
+                # ETag strong but distinct from the identity one.
+                headers["ETag"] = _encoded_etag(etag, encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _match_encoded_etag(headers: MutableHeaders, encoding: str, if_none_match: str):
+        """A 304 for a client holding the compressed body echoes the ETag it has."""
+        etag = headers.get("etag")
+        if etag and etag.startswith('"') and _encoded_etag(etag, encoding) in if_none_match:
+            headers["ETag"] = _encoded_etag(etag, encoding)
+
+    @staticmethod
+    def _compressible(content_type: str) -> bool:
+        content_type = content_type.lower()
+        if content_type.startswith("text/event-stream"):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request and hands the result to services.metrics,
+    labelled by route template ("/projects/{project_id}", never the raw
+    path, so ids don't explode the label set). Wraps everything else,
+    compression included, and covers streamed bodies until the last chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        token = metrics.start_request()
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            metrics.finish_request(
+                token,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+                time.perf_counter() - start,
+            )
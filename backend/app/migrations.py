@@ -0,0 +1,205 @@
+# app/migrations.py
+"""
+Small, idempotent schema migrations for databases that already exist.
+
+Base.metadata.create_all() only creates missing tables. It never adds
+columns or indexes to tables that are already there, such as an existing
+app.db. Each migration below runs once. Its name is then recorded in the
+schema_migrations table.
+
+Several workers usually start at once against the same database, so the
+table creation and every migration run under the database's write lock
+(see _schema_lock); the workers that wait find everything already done.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.schema import CreateIndex
+
+from . import models
+from .config import settings
+from .database import Base
+from .services import history, search
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("name", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# ---------- Migrations ----------
+
+def _create_model_indexes(conn):
+    """Create every index declared on the models that is missing from the DB."""
+    existing_tables = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _add_model_columns(conn):
+    """
+    ALTER TABLE ... ADD COLUMN for every model column missing from the DB.
+    NOT NULL columns need a server_default so existing rows get a value.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    preparer = conn.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in have:
+                continue
+            ddl = (
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} "
+                f"{column.type.compile(dialect=conn.dialect)}"
+            )
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            conn.execute(text(ddl))
+
+
+def _refinement_storage_columns(conn):
+    _add_model_columns(conn)
+    _create_model_indexes(conn)
+
+
+def _compact_refinement_history(conn):
+    """
+    Re-encode full-text refinement rows as keyframes + compressed diffs,
+    one section at a time. (SQLite reuses the freed pages; run VACUUM
+    once by hand to shrink the file itself.)
+    """
+    t = models.Refinement.__table__
+    section_ids = conn.execute(
+        select(t.c.section_id).where(t.c.storage.is_(None)).distinct()
+    ).scalars().all()
+
+    for section_id in section_ids:
+        rows = conn.execute(
+            select(t.c.id, t.c.storage, t.c.old_content, t.c.new_content)
+            .where(t.c.section_id == section_id)
+            .order_by(t.c.id)
+        ).all()
+
+        prev = None  # (id, chain_depth, text) of the previous legacy row
+        for row in rows:
+            if row.storage is not None:
+                prev = None  # already compact: start a new chain after it
+                continue
+            old, new = row.old_content or "", row.new_content or ""
+            if prev is None:
+                values = history.encode(old, new)
+            else:
+                values = history.encode(
+                    old, new, prev_id=prev[0], prev_depth=prev[1], prev_text=prev[2]
+                )
+            conn.execute(t.update().where(t.c.id == row.id).values(**values))
+            prev = (row.id, values["chain_depth"], new)
+
+
+def _section_feedback_counters(conn):
+    """Add Section.likes/dislikes and seed them from any existing feedback rows."""
+    _add_model_columns(conn)
+    sections = models.Section.__table__
+    feedbacks = models.Feedback.__table__
+
+    def count(is_like: bool):
+        return (
+            select(func.count(feedbacks.c.id))
+            .where(feedbacks.c.section_id == sections.c.id, feedbacks.c.is_like == is_like)
+            .scalar_subquery()
+        )
+
+    conn.execute(sections.update().values(likes=count(True), dislikes=count(False)))
+
+
+def _search_index(conn):
+    """Create the FTS5 search index and fill it from the existing rows (SQLite only)."""
+    if not search.fts5_available(conn):
+        print("⚠ SQLite FTS5 not available; /search falls back to LIKE queries.")
+        return
+    search.create_table(conn)
+    search.rebuild(conn)
+
+
+def _resource_versions(conn):
+    """Add Project.version / Section.version; existing rows start at 1."""
+    _add_model_columns(conn)
+
+
+MIGRATIONS = [
+    ("0001_hot_query_indexes", _create_model_indexes),
+    ("0002_refinement_storage_columns", _refinement_storage_columns),
+    ("0003_compact_refinement_history", _compact_refinement_history),
+    ("0004_section_feedback_counters", _section_feedback_counters),
+    ("0005_search_index", _search_index),
+    ("0006_resource_versions", _resource_versions),
+]
+
+
+# ---------- Runner ----------
+
+# How long a starting worker waits for another one's migrations (SQLite);
+# compacting a large refinement history can take a while.
+MIGRATION_LOCK_TIMEOUT_MS = 10 * 60 * 1000
+# pg_advisory_xact_lock key, any constant shared by all workers
+_PG_LOCK_KEY = 0x6D696772  # "migr"
+
+
+@contextmanager
+def _schema_lock(engine):
+    """
+    A connection in a transaction that holds the database's write lock:
+    BEGIN IMMEDIATE on SQLite, a transaction-scoped advisory lock on
+    Postgres. Plain transactions aren't enough: pysqlite defers BEGIN and
+    SQLite takes no lock for reads, so every worker would see the same
+    migrations as pending. Commits on success, rolls back on error.
+    """
+    with engine.connect() as conn:
+        dialect = conn.dialect.name
+        if dialect == "sqlite":
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {MIGRATION_LOCK_TIMEOUT_MS}")
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        elif dialect == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if dialect == "sqlite":
+                conn.exec_driver_sql(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+
+
+def run_migrations(engine):
+    """Create missing tables and apply pending migrations, one worker at a time."""
+    applied_now = []
+    with _schema_lock(engine) as conn:
+        Base.metadata.create_all(bind=conn)
+        _meta.create_all(bind=conn)
+        applied = set(conn.execute(select(schema_migrations.c.name)).scalars())
+        for name, migrate in MIGRATIONS:
+            if name in applied:
+                continue
+            migrate(conn)
+            conn.execute(
+                schema_migrations.insert().values(name=name, applied_at=datetime.utcnow())
+            )
+            applied_now.append(name)
+
+    for name in applied_now:
+        print(f"✅ Applied migration {name}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -21,10 +21,22 @@ class Project(Base):
     name = Column(String, nullable=False)
     document_type = Column(String, nullable=False)  # "docx" or "pptx"
     main_topic = Column(String, nullable=False)
+    # Bumped whenever the project or anything in it changes (services/versioning.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     owner = relationship("User", back_populates="projects")
-    sections = relationship("Section", back_populates="project", cascade="all, delete-orphan")
+    sections = relationship(
+        "Section",
+        back_populates="project",
+        cascade="all, delete-orphan",
+        order_by="(Section.order_index, Section.id)",
+    )
+
+    __table_args__ = (
+        # Listing a user's projects, paginated by id
+        Index("ix_projects_owner_id_id", "owner_id", "id"),
+    )
 
 
 class Section(Base):
@@ -35,11 +47,30 @@ class Section(Base):
     order_index = Column(Integer, nullable=False)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=True)  # latest content
+    # Denormalized from the feedbacks table; only changed by atomic increments
+    likes = Column(Integer, nullable=False, default=0, server_default="0")
+    dislikes = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped on content/title edits, refinements, comments and votes
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     project = relationship("Project", back_populates="sections")
-    refinements = relationship("Refinement", back_populates="section", cascade="all, delete-orphan")
+    refinements = relationship(
+        "Refinement",
+        back_populates="section",
+        cascade="all, delete-orphan",
+        order_by="(Refinement.created_at, Refinement.id)",
+    )
     feedbacks = relationship("Feedback", back_populates="section", cascade="all, delete-orphan")
-    comments = relationship("Comment", back_populates="section", cascade="all, delete-orphan")
+    comments = relationship(
+        "Comment",
+        back_populates="section",
+        cascade="all, delete-orphan",
+        order_by="(Comment.created_at, Comment.id)",
+    )
+
+    __table_args__ = (
+        Index("ix_sections_project_id_order_index", "project_id", "order_index"),
+    )
 
 
 class Refinement(Base):
@@ -48,12 +79,28 @@ class Refinement(Base):
     id = Column(Integer, primary_key=True, index=True)
     section_id = Column(Integer, ForeignKey("sections.id"), nullable=False)
     prompt = Column(Text, nullable=False)   # refinement prompt
+    # Legacy full-text columns; NULL once a row is stored compactly
     old_content = Column(Text, nullable=True)
     new_content = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Compact storage (see services/history.py):
+    # storage "key"   -> content_blob is the zlib-compressed new text,
+    #         "delta" -> content_blob is a compressed diff against base_id's text.
+    # The old text is base_id's text, or old_blob when it didn't follow on.
+    storage = Column(String, nullable=True)
+    content_blob = Column(LargeBinary, nullable=True)
+    old_blob = Column(LargeBinary, nullable=True)
+    base_id = Column(Integer, ForeignKey("refinements.id"), nullable=True)
+    chain_depth = Column(Integer, nullable=True)  # deltas since the last keyframe
+
     section = relationship("Section", back_populates="refinements")
 
+    __table_args__ = (
+        Index("ix_refinements_section_id_created_at", "section_id", "created_at"),
+        Index("ix_refinements_section_id_id", "section_id", "id"),  # history versions
+    )
+
 
 class Feedback(Base):
     __tablename__ = "feedbacks"
@@ -65,6 +112,10 @@ class Feedback(Base):
 
     section = relationship("Section", back_populates="feedbacks")
 
+    __table_args__ = (
+        Index("ix_feedbacks_section_id_created_at", "section_id", "created_at"),
+    )
+
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -75,3 +126,35 @@ class Comment(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     section = relationship("Section", back_populates="comments")
+
+    __table_args__ = (
+        Index("ix_comments_section_id_created_at", "section_id", "created_at"),
+    )
+
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued / running / done
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    project = relationship("Project")
+    tasks = relationship("GenerationTask", back_populates="job", cascade="all, delete-orphan")
+
+
+class GenerationTask(Base):
+    __tablename__ = "generation_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("generation_jobs.id"), nullable=False, index=True)
+    section_id = Column(Integer, ForeignKey("sections.id"), nullable=False)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending / running / done / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+
+    job = relationship("GenerationJob", back_populates="tasks")
+    section = relationship("Section")
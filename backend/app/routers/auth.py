@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from .. import models, schemas
-from ..auth import get_db, hash_password, verify_password, create_access_token
+from ..auth import hash_password, verify_password, create_access_token
+from ..database import get_db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -38,5 +39,5 @@ def login(
             detail="Invalid credentials",
         )
 
-    access_token = create_access_token({"sub": user.id})
+    access_token = create_access_token({"sub": str(user.id)})  # JWT "sub" must be a string
     return {"access_token": access_token, "token_type": "bearer"}
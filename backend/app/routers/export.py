@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-import os
-from docx import Document
-from pptx import Presentation
-
-from ..auth import get_current_user, get_db
-from .. import models
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+import asyncio
+
+from ..auth import get_current_user_async, get_current_user_read
+from ..database import get_async_db, get_read_db
+from .. import etags, models, schemas
+from ..services.export_cache import export_cache, project_fingerprint
+from ..services.exporter import (
+    MEDIA_TYPES,
+    iter_bytes,
+    iter_zip,
+    project_payload,
+    render_async,
+    render_in_pool,
+    render_many,
+)
 
 router = APIRouter(prefix="/export", tags=["export"])
 
+# Async twins of the export routes, mounted ahead of `router` in async_mode
+async_router = APIRouter(prefix="/export", tags=["export"])
+
 
 # ---------- Helper to load project ----------
 def _get_project_or_404(project_id: int, db: Session, current_user: models.User):
@@ -23,66 +37,183 @@ def _get_project_or_404(project_id: int, db: Session, current_user: models.User)
     return project
 
 
-# ---------- DOCX Export ----------
-@router.get("/docx/{project_id}")
-def export_project_docx(
-    project_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    project = _get_project_or_404(project_id, db, current_user)
+# ---------- Export ----------
+def _export(fmt: str, project: models.Project, request: Request):
+    """
+    - If-None-Match matches the content hash -> 304.
+    - Cached artifact for this content -> served from exports/.
+    - Otherwise the document is rendered in memory in the export process
+      pool and streamed back (and stored in the cache, if enabled).
+    """
+    payload = project_payload(project)
+    key = project_fingerprint(payload, fmt)
+    etag = f'"{key}"'
+    filename = f"project_{project.id}.{fmt}"
+    headers = etags.headers(etag)
+
+    if etags.if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if export_cache:
+        path = export_cache.get(key, fmt)
+        if path is not None:
+            return FileResponse(path, media_type=MEDIA_TYPES[fmt], filename=filename, headers=headers)
+
+    data = render_in_pool(fmt, payload)
+
+    if export_cache:
+        try:
+            export_cache.put(key, fmt, data)
+        except OSError as e:
+            print("⚠ Could not store export in cache:", repr(e))
+
+    return _stream_export(fmt, filename, data, headers)
+
+
+def _stream_export(fmt: str, filename: str, data: bytes, headers: dict):
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    headers["Content-Length"] = str(len(data))
+    return StreamingResponse(iter_bytes(data), media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+async def _aexport(fmt: str, project_id: int, request: Request, db: AsyncSession, current_user):
+    """async_mode version of _export(): awaits the render process instead of a thread."""
+    result = await db.execute(
+        select(models.Project)
+        .options(selectinload(models.Project.sections))
+        .where(models.Project.id == project_id, models.Project.owner_id == current_user.id)
+    )
+    project = result.scalars().first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    payload = project_payload(project)
+    key = project_fingerprint(payload, fmt)
+    etag = f'"{key}"'
+    filename = f"project_{project.id}.{fmt}"
+    headers = etags.headers(etag)
+
+    if etags.if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
 
-    filename = f"project_{project.id}.docx"
-    filepath = os.path.join("exports", filename)
+    if export_cache:
+        path = export_cache.get(key, fmt)
+        if path is not None:
+            return FileResponse(path, media_type=MEDIA_TYPES[fmt], filename=filename, headers=headers)
 
-    os.makedirs("exports", exist_ok=True)
+    data = await render_async(fmt, payload)
 
-    doc = Document()
+    if export_cache:
+        try:
+            await asyncio.to_thread(export_cache.put, key, fmt, data)
+        except OSError as e:
+            print("⚠ Could not store export in cache:", repr(e))
 
-    doc.add_heading(project.name, level=1)
-    doc.add_paragraph(f"Main Topic: {project.main_topic}")
-    doc.add_paragraph("\n")
+    return _stream_export(fmt, filename, data, headers)
 
-    for section in project.sections:
-        doc.add_heading(section.title, level=2)
-        doc.add_paragraph(section.content or "")
 
-    doc.save(filepath)
-    return FileResponse(filepath, filename=filename)
+# ---------- DOCX Export ----------
+@router.get("/docx/{project_id}")
+def export_project_docx(
+    project_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read)
+):
+    project = _get_project_or_404(project_id, db, current_user)
+    return _export("docx", project, request)
 
 
 # ---------- PPTX Export ----------
 @router.get("/pptx/{project_id}")
 def export_project_pptx(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read)
 ):
     project = _get_project_or_404(project_id, db, current_user)
+    return _export("pptx", project, request)
 
-    filename = f"project_{project.id}.pptx"
-    filepath = os.path.join("exports", filename)
-
-    os.makedirs("exports", exist_ok=True)
 
-    ppt = Presentation()
-
-    # Title slide
-    slide = ppt.slides.add_slide(ppt.slide_layouts[0])
-    title = slide.shapes.title
-    subtitle = slide.placeholders[1]
+@async_router.get("/docx/{project_id}")
+async def aexport_project_docx(
+    project_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    return await _aexport("docx", project_id, request, db, current_user)
 
-    title.text = project.name
-    subtitle.text = project.main_topic
 
-    # Content slides
-    for section in project.sections:
-        slide = ppt.slides.add_slide(ppt.slide_layouts[1])
-        title = slide.shapes.title
-        body = slide.placeholders[1]
+@async_router.get("/pptx/{project_id}")
+async def aexport_project_pptx(
+    project_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    return await _aexport("pptx", project_id, request, db, current_user)
 
-        title.text = section.title
-        body.text = section.content or ""
 
-    ppt.save(filepath)
-    return FileResponse(filepath, filename=filename)
+# ---------- Bulk export (ZIP) ----------
+@router.post("/bulk")
+def export_projects_bulk(
+    request_in: schemas.BulkExportRequest,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read)
+):
+    """
+    Export several projects as one ZIP. Documents are rendered in parallel
+    in the export process pool, and each ZIP entry is streamed as soon as
+    its document is ready, so memory use does not grow with the number of
+    projects.
+    """
+    ids = list(dict.fromkeys(request_in.project_ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No project ids given")
+
+    projects = (
+        db.query(models.Project)
+        .options(selectinload(models.Project.sections))
+        .filter(models.Project.id.in_(ids), models.Project.owner_id == current_user.id)
+        .all()
+    )
+    missing = sorted(set(ids) - {p.id for p in projects})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Project(s) not found: {missing}")
+
+    fmt = request_in.format
+    by_id = {p.id: project_payload(p) for p in projects}
+    payloads = [by_id[i] for i in ids]
+
+    cache_hits = set()
+
+    def cached_bytes(payload):
+        if not export_cache:
+            return None
+        path = export_cache.get(project_fingerprint(payload, fmt), fmt)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        cache_hits.add(payload["id"])
+        return data
+
+    def entries():
+        for payload, data in render_many(fmt, payloads, lookup=cached_bytes):
+            if export_cache and payload["id"] not in cache_hits:
+                try:
+                    export_cache.put(project_fingerprint(payload, fmt), fmt, data)
+                except OSError as e:
+                    print("⚠ Could not store export in cache:", repr(e))
+            yield f"project_{payload['id']}.{fmt}", data
+
+    return StreamingResponse(
+        iter_zip(entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="projects_{fmt}.zip"'},
+    )
@@ -0,0 +1,55 @@
+# backend/app/routers/llm.py
+
+from fastapi import APIRouter, Response, status
+
+from ..services.llm_service import llm_service
+from ..services.prefetch import refine_prefetcher
+
+router = APIRouter(prefix="/llm", tags=["llm"])
+
+
+# ---------- Readiness ----------
+
+@router.get("/ready")
+def ready(response: Response):
+    """
+    Reports whether model selection has finished and whether the service
+    runs in "live" (Gemini) or "stub" mode. 503 while still initializing.
+    """
+    info = llm_service.status()
+    if not info["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return info
+
+
+# ---------- Response cache ----------
+
+@router.get("/cache")
+def cache_stats():
+    if not llm_service.cache:
+        return {"enabled": False}
+    return {"enabled": True, **llm_service.cache.stats()}
+
+
+# ---------- In-flight call coalescing ----------
+
+@router.get("/singleflight")
+def singleflight_stats():
+    return llm_service.inflight.stats()
+
+
+# ---------- Rate limiter / circuit breaker ----------
+
+@router.get("/limits")
+def limits_state():
+    return {
+        "rate_limiter": llm_service.limiter.state(),
+        "circuit_breaker": llm_service.breaker.state(),
+    }
+
+
+# ---------- Speculative preset refinements ----------
+
+@router.get("/prefetch")
+def prefetch_stats():
+    return refine_prefetcher.stats()
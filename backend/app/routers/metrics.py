@@ -0,0 +1,71 @@
+# backend/app/routers/metrics.py
+
+from fastapi import APIRouter, Response
+
+from ..services.auth_cache import auth_cache
+from ..services.llm_service import llm_service
+from ..services.metrics import CONTENT_TYPE, metrics
+from ..services.prefetch import refine_prefetcher
+
+router = APIRouter(tags=["metrics"])
+
+
+# ---------- Gauges from the services' own counters ----------
+
+def _service_stats():
+    if llm_service.cache:
+        cache = llm_service.cache.stats()
+        yield "llm_cache_entries", "gauge", "LLM response cache entries in memory.", [({}, cache["memory_entries"])]
+        yield "llm_cache_lookups_total", "counter", "LLM response cache lookups by result.", [
+            ({"result": "memory_hit"}, cache["memory_hits"]),
+            ({"result": "disk_hit"}, cache["disk_hits"]),
+            ({"result": "miss"}, cache["misses"]),
+            ({"result": "bypass"}, cache["bypassed"]),
+        ]
+        if cache["disk_enabled"]:
+            yield "llm_cache_disk_entries", "gauge", "LLM response cache rows in the SQLite file.", [({}, cache["disk_entries"] or 0)]
+            yield "llm_cache_disk_bytes", "gauge", "Size of the LLM cache SQLite file and its WAL.", [({}, cache["disk_bytes"])]
+
+    inflight = llm_service.inflight.stats()
+    yield "llm_singleflight_in_flight", "gauge", "Distinct LLM calls in flight.", [({}, inflight["in_flight"])]
+    yield "llm_singleflight_calls_total", "counter", "LLM calls executed vs. coalesced.", [
+        ({"result": "executed"}, inflight["executed"]),
+        ({"result": "coalesced"}, inflight["coalesced"]),
+    ]
+
+    breaker = llm_service.breaker.state()
+    yield "llm_circuit_open", "gauge", "1 while the Gemini circuit breaker is not closed.", [
+        ({}, 0 if breaker["state"] == "closed" else 1)
+    ]
+    limiter = llm_service.limiter.state()
+    yield "llm_rate_limit_waited_seconds_total", "counter", "Time spent waiting for rate-limit budget.", [
+        ({}, limiter["waited_seconds"])
+    ]
+
+    if refine_prefetcher.enabled:
+        prefetch = refine_prefetcher.stats()
+        yield "refine_prefetch_pending", "gauge", "Sections waiting for speculative refinement.", [
+            ({}, prefetch["pending"])
+        ]
+        yield "refine_prefetch_total", "counter", "Speculative refinement events by kind.", [
+            ({"event": name}, prefetch[name])
+            for name in ("scheduled", "dropped", "generated", "skipped", "hits", "misses", "invalidated")
+        ]
+
+    auth = auth_cache.stats()
+    yield "auth_cache_lookups_total", "counter", "Auth cache lookups by kind and result.", [
+        ({"kind": "token", "result": "hit"}, auth["token_hits"]),
+        ({"kind": "token", "result": "miss"}, auth["token_misses"]),
+        ({"kind": "user", "result": "hit"}, auth["user_hits"]),
+        ({"kind": "user", "result": "miss"}, auth["user_misses"]),
+    ]
+
+
+metrics.add_collector(_service_stats)
+
+
+# ---------- Prometheus endpoint ----------
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
@@ -1,24 +1,36 @@
 # backend/app/routers/projects.py
 
-from typing import List
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from ..database import get_db              # ✅ correct source of get_db
-from .. import models, schemas
-from ..auth import get_current_user
+from ..database import get_async_db, get_db, get_read_db  # ✅ correct source of get_db
+from .. import etags, models, schemas
+from ..auth import get_current_user, get_current_user_async, get_current_user_read
+from ..services import serializers
 from ..services.llm_service import llm_service
+from ..services.job_queue import job_queue
+from ..services.prefetch import refine_prefetcher
 
 router = APIRouter(
     prefix="/projects",
     tags=["projects"],
 )
 
+# Async twins of the slow routes, mounted ahead of `router` in async_mode
+async_router = APIRouter(
+    prefix="/projects",
+    tags=["projects"],
+)
+
 
 @router.post("/", response_model=schemas.ProjectOut)
 def create_project(
     project_in: schemas.ProjectCreate,
+    use_cache: bool = True,  # ?use_cache=false forces fresh Gemini calls
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -33,21 +45,22 @@ def create_project(
     db.commit()
     db.refresh(project)
 
-    # Create sections with AI-generated initial content
-    for sec in project_in.sections:
+    # Create sections with AI-generated initial content.
+    # Gemini calls fan out concurrently; rows are still written in order_index order.
+    ordered = sorted(project_in.sections, key=lambda s: s.order_index)
+    ai_texts = llm_service.generate_sections(
+        main_topic=project_in.main_topic,
+        section_titles=[sec.title for sec in ordered],
+        use_cache=use_cache,
+    )
+
+    for sec, ai_text in zip(ordered, ai_texts):
         section = models.Section(
             project_id=project.id,
             order_index=sec.order_index,
             title=sec.title,
+            content=ai_text,
         )
-
-        # 🔹 AI initial generation
-        ai_text = llm_service.generate_section(
-            main_topic=project_in.main_topic,
-            section_title=sec.title,
-        )
-        section.content = ai_text
-
         db.add(section)
 
     db.commit()
@@ -55,33 +68,244 @@ def create_project(
     return project
 
 
-@router.get("/", response_model=List[schemas.ProjectOut])
-def list_projects(
+@async_router.post("/", response_model=schemas.ProjectOut)
+async def acreate_project(
+    project_in: schemas.ProjectCreate,
+    use_cache: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    """
+    async_mode version of create_project(): the Gemini calls are awaited,
+    so a slow generation holds no threadpool thread.
+    """
+    project = models.Project(
+        name=project_in.name,
+        document_type=project_in.document_type,
+        main_topic=project_in.main_topic,
+        owner_id=current_user.id,
+    )
+    db.add(project)
+    # Committing also hands the connection back to the pool while we wait on Gemini
+    await db.commit()
+
+    ordered = sorted(project_in.sections, key=lambda s: s.order_index)
+    ai_texts = await llm_service.agenerate_sections(
+        main_topic=project_in.main_topic,
+        section_titles=[sec.title for sec in ordered],
+        use_cache=use_cache,
+    )
+
+    for sec, ai_text in zip(ordered, ai_texts):
+        db.add(models.Section(
+            project_id=project.id,
+            order_index=sec.order_index,
+            title=sec.title,
+            content=ai_text,
+        ))
+    await db.commit()
+
+    # No lazy loading on an AsyncSession: load what the response needs
+    result = await db.execute(
+        select(models.Project)
+        .options(selectinload(models.Project.sections).selectinload(models.Section.comments))
+        .where(models.Project.id == project.id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+# ---------- Background generation ----------
+
+def _job_to_out(job: models.GenerationJob) -> schemas.GenerationJobOut:
+    tasks = sorted(job.tasks, key=lambda t: t.section.order_index)
+    return schemas.GenerationJobOut(
+        id=job.id,
+        project_id=job.project_id,
+        status=job.status,
+        total=len(tasks),
+        completed=sum(1 for t in tasks if t.status in ("done", "failed")),
+        failed=sum(1 for t in tasks if t.status == "failed"),
+        tasks=[
+            schemas.GenerationTaskOut(
+                section_id=t.section_id,
+                order_index=t.section.order_index,
+                title=t.section.title,
+                status=t.status,
+                attempts=t.attempts,
+                error=t.error,
+            )
+            for t in tasks
+        ],
+    )
+
+
+@router.post(
+    "/async",
+    response_model=schemas.GenerationJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_project_async(
+    project_in: schemas.ProjectCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    projects = (
+    """
+    Persist the project and its (empty) sections, then return a job id
+    immediately. Section content is filled in by the background worker pool;
+    poll GET /projects/jobs/{job_id} for progress.
+    """
+    project = models.Project(
+        name=project_in.name,
+        document_type=project_in.document_type,
+        main_topic=project_in.main_topic,
+        owner_id=current_user.id,
+    )
+    db.add(project)
+
+    job = models.GenerationJob(project=project, status="queued")
+    db.add(job)
+
+    for sec in sorted(project_in.sections, key=lambda s: s.order_index):
+        section = models.Section(
+            project=project,
+            order_index=sec.order_index,
+            title=sec.title,
+        )
+        db.add(section)
+        db.add(models.GenerationTask(job=job, section=section, status="pending"))
+
+    if not project_in.sections:
+        job.status = "done"
+
+    db.commit()
+    db.refresh(job)
+
+    job_queue.enqueue_job(job.id)
+    return _job_to_out(job)
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.GenerationJobOut)
+def get_generation_job(
+    job_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
+):
+    job = (
+        db.query(models.GenerationJob)
+        .join(models.Project)
+        .filter(
+            models.GenerationJob.id == job_id,
+            models.Project.owner_id == current_user.id,
+        )
+        .first()
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_to_out(job)
+
+
+FIELDS_HELP = "Comma-separated fields, dotted for nested ones, e.g. name,sections.title"
+INCLUDE_HELP = "Relations to embed: sections, sections.comments (default: all; empty: none)"
+
+
+@router.get(
+    "/",
+    response_model=Union[List[schemas.ProjectOut], List[schemas.ProjectSummary]],
+)
+def list_projects(
+    cursor: Optional[int] = Query(None, description="Return projects with id > cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size (default: all)"),
+    summary: bool = Query(False, description="Leave out section content and comments"),
+    fields: Optional[str] = Query(None, description=FIELDS_HELP),
+    include: Optional[str] = Query(None, description=INCLUDE_HELP),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
+):
+    """
+    Lists the current user's projects, ordered by id.
+
+    `fields` / `include` pick what goes into each project (summary=true is
+    shorthand for section titles only); only those columns and relations
+    are loaded, batch-wise with selectinload, so the listing costs a fixed
+    number of queries no matter how many projects there are. When `limit`
+    is given and more projects remain, the X-Next-Cursor header holds the
+    cursor for the next page.
+    """
+    if summary:
+        fields, include = "sections.order_index,sections.title", "sections"
+    selection = serializers.parse_selection("project", fields, include)
+
+    query = (
         db.query(models.Project)
         .filter(models.Project.owner_id == current_user.id)
-        .all()
+        .order_by(models.Project.id)
+        .options(*serializers.loader_options(selection))
     )
-    return projects
+    if cursor is not None:
+        query = query.filter(models.Project.id > cursor)
+
+    headers = {}
+    if limit is not None:
+        projects = query.limit(limit + 1).all()
+        if len(projects) > limit:
+            projects = projects[:limit]
+            headers["X-Next-Cursor"] = str(projects[-1].id)
+    else:
+        projects = query.all()
+
+    # Plain dicts + orjson instead of validating every ORM row through Pydantic
+    return serializers.json_response(serializers.dump_many(projects, selection), headers=headers)
 
 
 @router.get("/{project_id}", response_model=schemas.ProjectOut)
 def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_HELP),
+    include: Optional[str] = Query(None, description=INCLUDE_HELP),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
 ):
+    """
+    One project. The response carries a strong ETag built from the
+    project's version, which every change to the project, its sections or
+    their comments bumps; a matching If-None-Match gets a 304 after a
+    single primary-key lookup, without loading any sections.
+    """
+    selection = serializers.parse_selection("project", fields, include)
+    version = db.scalar(
+        select(models.Project.version).where(
+            models.Project.id == project_id,
+            models.Project.owner_id == current_user.id,
+        )
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    etag = etags.resource_etag("project", project_id, version, fields, include)
+    if etags.if_none_match(request, etag):
+        return etags.not_modified(etag)
+
+    # The version is read before the body: a write landing in between gives
+    # a newer body under an older tag (one extra 200 later), never the
+    # reverse, so a client can't get stuck on a stale copy.
     project = (
         db.query(models.Project)
         .filter(
             models.Project.id == project_id,
             models.Project.owner_id == current_user.id,
         )
+        .options(*serializers.loader_options(selection))
         .first()
     )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    if refine_prefetcher.enabled:
+        # A real read (not an ETag poll): its sections are on screen now,
+        # preset refinements may be clicked next
+        refine_prefetcher.schedule(db.scalars(
+            select(models.Section.id)
+            .where(models.Section.project_id == project_id)
+            .order_by(models.Section.order_index)
+        ).all())
+    return serializers.json_response(serializers.dump(project, selection), headers=etags.headers(etag))
@@ -0,0 +1,30 @@
+# backend/app/routers/search.py
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..auth import get_current_user_read
+from ..database import get_read_db
+from ..services.search import search_index
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/", response_model=schemas.SearchResults)
+def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; end a word with * for prefix search"),
+    kind: Optional[Literal["project", "section", "comment", "refinement"]] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
+):
+    """
+    Full-text search over the current user's project topics, section
+    titles and content, comments and refinement prompts, best match first.
+    """
+    total, hits = search_index.search(db, current_user.id, q, kind, offset, limit)
+    return schemas.SearchResults(total=total, offset=offset, limit=limit, items=hits)
@@ -1,18 +1,30 @@
 # backend/app/routers/sections.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+import json
+import threading
 
-from .. import models, schemas
-from ..database import get_db          # ✅ get_db comes from database, not auth
-from ..auth import get_current_user
-from ..services.llm_service import llm_service
+from .. import etags, models, schemas
+from ..database import SessionLocal, get_async_db, get_db, get_read_db  # ✅ get_db comes from database, not auth
+from ..auth import get_current_user, get_current_user_async, get_current_user_read
+from ..services import history, serializers
+from ..services.feedback import feedback_buffer
+from ..services.llm_service import StreamInterruptedError, llm_service
+from ..services.prefetch import refine_prefetcher
 
 router = APIRouter(prefix="/sections", tags=["sections"])
 
+# Async twins of the slow routes, mounted ahead of `router` in async_mode
+async_router = APIRouter(prefix="/sections", tags=["sections"])
 
-def _get_section_or_404(section_id: int, db: Session, current_user: models.User) -> models.Section:
+
+def _get_section_or_404(section_id: int, db: Session, current_user: models.User, options=()) -> models.Section:
     section = (
         db.query(models.Section)
         .join(models.Project)
@@ -20,6 +32,7 @@ def _get_section_or_404(section_id: int, db: Session, current_user: models.User)
             models.Section.id == section_id,
             models.Project.owner_id == current_user.id,
         )
+        .options(*options)
         .first()
     )
     if not section:
@@ -27,14 +40,46 @@ def _get_section_or_404(section_id: int, db: Session, current_user: models.User)
     return section
 
 
+def _section_version_or_404(section_id: int, db: Session, current_user: models.User) -> int:
+    """Section.version alone, for If-None-Match checks (no content loaded)."""
+    version = db.scalar(
+        select(models.Section.version)
+        .join(models.Project)
+        .where(models.Section.id == section_id, models.Project.owner_id == current_user.id)
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    return version
+
+
 @router.get("/{section_id}", response_model=schemas.Section)
 def get_section(
     section_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,title or comments.text"),
+    include: Optional[str] = Query(None, description="comments (default) or empty for none"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
 ):
-    section = _get_section_or_404(section_id, db, current_user)
-    return section
+    """
+    One section, with a strong ETag from Section.version (bumped by edits,
+    refinements, comments and votes). A matching If-None-Match is answered
+    with 304 from the version alone; the content is never loaded.
+    """
+    selection = serializers.parse_selection("section", fields, include)
+    version = _section_version_or_404(section_id, db, current_user)
+    etag = etags.resource_etag("section", section_id, version, fields, include)
+    if etags.if_none_match(request, etag):
+        return etags.not_modified(etag)
+
+    # Version first, body second: a concurrent write can only make the
+    # body newer than its tag, which costs one extra 200 later.
+    section = _get_section_or_404(
+        section_id, db, current_user, serializers.loader_options(selection)
+    )
+    # A real read (not an ETag poll): preset refinements may be clicked next
+    refine_prefetcher.schedule([section_id])
+    return serializers.json_response(serializers.dump(section, selection), headers=etags.headers(etag))
 
 
 # ---------- Refinement ----------
@@ -43,6 +88,7 @@ def get_section(
 def refine_section(
     section_id: int,
     refinement_in: schemas.RefinementCreate,
+    use_cache: bool = True,  # ?use_cache=false forces a fresh Gemini call
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -51,59 +97,242 @@ def refine_section(
     project = section.project
     old_content = section.content or ""
 
+    # A preset may already have been refined in the background
+    new_content = refine_prefetcher.take(
+        section.id, old_content, section.title, project.main_topic, refinement_in.prompt
+    ) if use_cache else None
+
     # Call LLM service to generate new content
-    new_content = llm_service.refine_text(
-        original=old_content,
-        refinement_prompt=refinement_in.prompt,
-        section_title=section.title,
-        main_topic=project.main_topic,
-    )
+    if new_content is None:
+        new_content = llm_service.refine_text(
+            original=old_content,
+            refinement_prompt=refinement_in.prompt,
+            section_title=section.title,
+            main_topic=project.main_topic,
+            use_cache=use_cache,
+        )
 
-    # Store refinement history
-    refinement = models.Refinement(
-        section_id=section.id,
-        prompt=refinement_in.prompt,
-        old_content=old_content,
-        new_content=new_content,
-    )
+    # Store refinement history (compressed diff against the previous version)
+    history.record_refinement(db, section.id, refinement_in.prompt, old_content, new_content)
 
     # Update section content to latest
     section.content = new_content
 
-    db.add(refinement)
     db.commit()
     db.refresh(section)     # ✅ refresh section, since that's what we return
 
     return section          # ✅ return updated section instead of refinement
 
 
-# ---------- Feedback (like / dislike) ----------
-
-@router.post("/{section_id}/feedback")
-def give_feedback(
+@async_router.post("/{section_id}/refine", response_model=schemas.Section)
+async def arefine_section(
     section_id: int,
-    payload: schemas.FeedbackRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    refinement_in: schemas.RefinementCreate,
+    use_cache: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
 ):
-    section = (
-        db.query(models.Section)
-        .filter(models.Section.id == section_id)
-        .first()
+    """async_mode version of refine_section()."""
+    result = await db.execute(
+        select(models.Section)
+        .join(models.Project)
+        .options(selectinload(models.Section.project), selectinload(models.Section.comments))
+        .where(
+            models.Section.id == section_id,
+            models.Project.owner_id == current_user.id,
+        )
     )
+    section = result.scalars().first()
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
 
-    # Only update if these columns exist on the model
-    if hasattr(section, "likes") and hasattr(section, "dislikes"):
-        if payload.is_like:
-            section.likes = (section.likes or 0) + 1
-        else:
-            section.dislikes = (section.dislikes or 0) + 1
+    old_content = section.content or ""
+
+    # End the read transaction so the pooled connection isn't held for the
+    # whole Gemini call (objects stay usable: expire_on_commit=False).
+    await db.commit()
+
+    new_content = refine_prefetcher.take(
+        section.id, old_content, section.title, section.project.main_topic, refinement_in.prompt
+    ) if use_cache else None
+    if new_content is None:
+        new_content = await llm_service.arefine_text(
+            original=old_content,
+            refinement_prompt=refinement_in.prompt,
+            section_title=section.title,
+            main_topic=section.project.main_topic,
+            use_cache=use_cache,
+        )
+
+    await db.run_sync(
+        history.record_refinement, section.id, refinement_in.prompt, old_content, new_content
+    )
+    section.content = new_content
+    await db.commit()
+
+    return section
+
+
+# ---------- Streaming refinement (Server-Sent Events) ----------
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _save_refinement(section_id: int, prompt: str, old_content: str, new_content: str) -> dict:
+    # Runs after the stream ends, outside the request's session:
+    # the Refinement row and Section.content go in together in one commit.
+    db = SessionLocal()
+    try:
+        section = db.get(models.Section, section_id)
+        if section is None:
+            return {}
+        history.record_refinement(db, section.id, prompt, old_content, new_content)
+        section.content = new_content
         db.commit()
         db.refresh(section)
+        return schemas.Section.model_validate(section).model_dump()
+    finally:
+        db.close()
+
+
+@router.post("/{section_id}/refine/stream")
+def refine_section_stream(
+    section_id: int,
+    refinement_in: schemas.RefinementCreate,
+    request: Request,
+    use_cache: bool = True,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Same as POST /sections/{id}/refine, but streams the new text as SSE:
+    `token` events with {"text": ...} chunks, then one `done` event with
+    the saved section. If Gemini fails partway through, an `error` event
+    replaces `done`. Nothing is saved unless the stream completes.
+    """
+    section = _get_section_or_404(section_id, db, current_user)
+
+    old_content = section.content or ""
+    section_title = section.title
+    main_topic = section.project.main_topic
+    prompt = refinement_in.prompt
 
-    return {"ok": True}
+    async def event_stream():
+        cancel = threading.Event()
+        chunks = llm_service.stream_refine(
+            original=old_content,
+            refinement_prompt=prompt,
+            section_title=section_title,
+            main_topic=main_topic,
+            use_cache=use_cache,
+            cancel=cancel,
+        )
+        parts = []
+        try:
+            while True:
+                if await request.is_disconnected():
+                    return
+                try:
+                    chunk = await run_in_threadpool(next, chunks, None)
+                except StreamInterruptedError:
+                    # The tokens sent so far are a fragment: keep the old content
+                    yield _sse("error", {"detail": "Refinement failed partway through; nothing was saved."})
+                    return
+                if chunk is None:
+                    break
+                parts.append(chunk)
+                yield _sse("token", {"text": chunk})
+
+            new_content = "".join(parts).strip()
+            saved = await run_in_threadpool(
+                _save_refinement, section_id, prompt, old_content, new_content
+            )
+            yield _sse("done", saved)
+        finally:
+            # Client gone (or stream finished): stop the upstream generation.
+            cancel.set()
+            try:
+                chunks.close()
+            except ValueError:
+                # Still running next() in a worker thread; `cancel` stops it.
+                pass
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------- Refinement history ----------
+
+@router.get("/{section_id}/history", response_model=schemas.RefinementHistory)
+def list_section_history(
+    section_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
+):
+    """
+    Refinements of a section, oldest first. Version N is the text after the
+    N-th refinement; fetch it from /sections/{id}/history/{version}.
+    """
+    section = _get_section_or_404(section_id, db, current_user)
+    return schemas.RefinementHistory(
+        total=history.count_versions(db, section.id),
+        offset=offset,
+        limit=limit,
+        items=[
+            schemas.RefinementVersion(
+                version=version,
+                refinement_id=row.id,
+                prompt=row.prompt,
+                created_at=row.created_at,
+            )
+            for version, row in history.list_history(db, section.id, offset, limit)
+        ],
+    )
+
+
+@router.get("/{section_id}/history/{version}", response_model=schemas.SectionVersionOut)
+def get_section_version(
+    section_id: int,
+    version: int,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
+):
+    """Rebuild the section text as of `version` (0 = before the first refinement)."""
+    section = _get_section_or_404(section_id, db, current_user)
+    content = history.version_text(db, section.id, version)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return schemas.SectionVersionOut(section_id=section.id, version=version, content=content)
+
+
+# ---------- Feedback (like / dislike) ----------
+
+@router.post("/{section_id}/feedback", response_model=schemas.FeedbackOut)
+def give_feedback(
+    section_id: int,
+    payload: schemas.FeedbackRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Count a like/dislike. The vote is buffered and written in a batch
+    (see services/feedback.py); the returned counts already include it.
+    """
+    section = _get_section_or_404(section_id, db, current_user)
+    feedback_buffer.record(section.id, payload.is_like)
+
+    pending_likes, pending_dislikes = feedback_buffer.pending(section.id)
+    return schemas.FeedbackOut(
+        ok=True,
+        likes=(section.likes or 0) + pending_likes,
+        dislikes=(section.dislikes or 0) + pending_dislikes,
+    )
 
 
 # ---------- Comments ----------
@@ -130,8 +359,16 @@ def add_comment(
 @router.get("/{section_id}/comments", response_model=List[schemas.CommentOut])
 def list_comments(
     section_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
 ):
+    version = _section_version_or_404(section_id, db, current_user)
+    etag = etags.resource_etag("comments", section_id, version, None, None)
+    if etags.if_none_match(request, etag):
+        return etags.not_modified(etag)
+
     section = _get_section_or_404(section_id, db, current_user)
+    response.headers.update(etags.headers(etag))
     return section.comments
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr
 from pydantic import ConfigDict  # if not already imported
 
@@ -72,6 +73,8 @@ class Section(BaseModel):
     order_index: int
     title: str
     content: Optional[str]
+    likes: int = 0
+    dislikes: int = 0
     comments: List[Comment] = []
 
     model_config = ConfigDict(from_attributes=True)
@@ -86,5 +89,91 @@ class Project(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class GenerationTaskOut(BaseModel):
+    section_id: int
+    order_index: int
+    title: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+
+
+class GenerationJobOut(BaseModel):
+    id: int
+    project_id: int
+    status: str
+    total: int
+    completed: int
+    failed: int
+    tasks: List[GenerationTaskOut] = []
+
+
+class SectionSummary(BaseModel):
+    id: int
+    order_index: int
+    title: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProjectSummary(BaseModel):
+    """Listing entry without section bodies or comments (GET /projects/?summary=true)."""
+    id: int
+    name: str
+    document_type: str
+    main_topic: str
+    sections: List[SectionSummary] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkExportRequest(BaseModel):
+    project_ids: List[int]
+    format: Literal["docx", "pptx"]
+
+
 class FeedbackRequest(BaseModel):
-    is_like: bool
\ No newline at end of file
+    is_like: bool
+
+
+class FeedbackOut(BaseModel):
+    ok: bool = True
+    likes: int
+    dislikes: int
+
+class RefinementVersion(BaseModel):
+    """One entry of GET /sections/{id}/history (no text; fetch it per version)."""
+    version: int
+    refinement_id: int
+    prompt: str
+    created_at: Optional[datetime] = None
+
+
+class RefinementHistory(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    items: List[RefinementVersion] = []
+
+
+class SectionVersionOut(BaseModel):
+    section_id: int
+    version: int  # 0 = text before the first refinement
+    content: str
+
+
+class SearchHit(BaseModel):
+    kind: Literal["project", "section", "comment", "refinement"]
+    id: int  # id of the project / section / comment / refinement
+    project_id: int
+    section_id: Optional[int] = None
+    title: str
+    snippet: str
+    score: float
+
+
+class SearchResults(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    items: List[SearchHit] = []
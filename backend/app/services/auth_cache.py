@@ -0,0 +1,165 @@
+# backend/app/services/auth_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app import models
+from app.config import settings
+
+
+class AuthCache:
+    """
+    Process-local LRU caches for the auth dependency:
+
+    - tokens: raw JWT -> user id, so a token seen before is not decoded and
+      verified again. Entries never outlive the token's own `exp`.
+    - users:  user id -> detached User snapshot, handed to each request's
+      session with merge(load=False), which runs no SQL.
+
+    Both expire after ttl_seconds. invalidate_user() drops a user and all of
+    their tokens; install() does that automatically whenever a User row is
+    changed or deleted through an ORM session. Other processes only notice
+    such a change once the TTL runs out.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._tokens: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._users: "OrderedDict[int, Tuple[models.User, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.token_hits = 0
+        self.token_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def install(self):
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "after_commit", self._after_commit)
+
+    # ---------- Tokens ----------
+
+    def get_token(self, token: str) -> Optional[int]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    self._drop_token(token)
+                self.token_misses += 1
+                return None
+            self._tokens.move_to_end(token)
+            self.token_hits += 1
+            return entry[0]
+
+    def set_token(self, token: str, user_id: int, token_exp: float):
+        if not self.enabled:
+            return
+        expires_at = min(token_exp, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._tokens[token] = (user_id, expires_at)
+            self._tokens.move_to_end(token)
+            self._tokens_by_user.setdefault(user_id, set()).add(token)
+            while len(self._tokens) > self.max_entries:
+                self._drop_token(next(iter(self._tokens)))
+
+    def _drop_token(self, token: str):
+        user_id, _ = self._tokens.pop(token)
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+    # ---------- Users ----------
+
+    def get_user(self, user_id: int) -> Optional[models.User]:
+        """Detached snapshot; attach it with session.merge(user, load=False)."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[1] <= now:
+                self._users.pop(user_id, None)
+                self.user_misses += 1
+                return None
+            self._users.move_to_end(user_id)
+            self.user_hits += 1
+            return entry[0]
+
+    def set_user(self, user: models.User):
+        if not self.enabled:
+            return
+        # A copy that belongs to no session, so it can be shared across
+        # requests and threads; only its column values are ever read.
+        snapshot = models.User(id=user.id, email=user.email, hashed_password=user.hashed_password)
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._users[user.id] = (snapshot, time.time() + self.ttl_seconds)
+            self._users.move_to_end(user.id)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+
+    # ---------- Invalidation ----------
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._users.pop(user_id, None)
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop_token(token)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+            self._tokens_by_user.clear()
+
+    def _after_flush(self, session: Session, _flush_context):
+        changed = {
+            obj.id
+            for obj in session.dirty | session.deleted
+            if isinstance(obj, models.User) and obj.id is not None
+        }
+        if changed:
+            session.info.setdefault("auth_changed_users", set()).update(changed)
+            for user_id in changed:
+                self.invalidate_user(user_id)
+
+    def _after_commit(self, session: Session):
+        # Again after commit: a request may have cached the old row while
+        # the change was still uncommitted.
+        for user_id in session.info.pop("auth_changed_users", ()):
+            self.invalidate_user(user_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "tokens": len(self._tokens),
+                "users": len(self._users),
+                "token_hits": self.token_hits,
+                "token_misses": self.token_misses,
+                "user_hits": self.user_hits,
+                "user_misses": self.user_misses,
+            }
+
+
+# Singleton instance used by app.auth; app.main installs the invalidation hook
+auth_cache = AuthCache(
+    max_entries=settings.auth_cache_max_entries,
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+)
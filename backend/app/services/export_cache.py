@@ -0,0 +1,150 @@
+# backend/app/services/export_cache.py
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+
+# Bump when the DOCX/PPTX layout changes so old artifacts are not served.
+EXPORT_LAYOUT_VERSION = "1"
+
+# What put() creates: <fingerprint>.<format> and its mkstemp() leftovers.
+# Anything else in the directory (hand-made exports, an operator's files)
+# is never evicted.
+_CACHE_FILE_RE = re.compile(r"^[0-9a-f]{64}\.(docx|pptx)$")
+_TEMP_FILE_RE = re.compile(r"^\.[0-9a-f]{64}\..+\.(docx|pptx)\.tmp$")
+
+
+def project_fingerprint(payload: Dict, fmt: str) -> str:
+    """
+    Hash of everything that ends up in the exported file: name, topic,
+    sections (in order) and the target format.
+    `payload` is exporter.project_payload(project).
+    """
+    data = json.dumps(
+        {
+            "layout": EXPORT_LAYOUT_VERSION,
+            "format": fmt,
+            "name": payload["name"],
+            "main_topic": payload["main_topic"],
+            "sections": [
+                [s["order_index"], s["title"], s["content"]] for s in payload["sections"]
+            ],
+        },
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ExportCache:
+    """
+    Content-addressed store of rendered exports in the exports/ directory.
+
+    Files are named <fingerprint>.<format>, written to a temp file and
+    renamed into place, so concurrent exports of the same project never see
+    a half-written file. Eviction drops files older than max_age_seconds,
+    then the least recently used ones until the cache fits max_bytes. Only
+    files named like the cache's own are counted or removed.
+    """
+
+    # Never evict files used this recently: a response may still be streaming them.
+    MIN_KEEP_SECONDS = 60
+
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._evict_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key: str, fmt: str) -> str:
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def get(self, key: str, fmt: str) -> Optional[str]:
+        path = self.path_for(key, fmt)
+        try:
+            # Bump mtime: eviction treats it as "last used"
+            os.utime(path, None)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError:
+            # Can't touch it (read-only mount, other owner): still a hit, it just ages sooner
+            if not os.path.isfile(path):
+                self.misses += 1
+                return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, fmt: str, data: bytes) -> str:
+        """Write the rendered bytes to a temp file, then atomically move it into place."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key, fmt)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.", suffix=f".{fmt}.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        self.evict()
+        return path
+
+    @staticmethod
+    def _owns(name: str) -> bool:
+        return bool(_CACHE_FILE_RE.match(name) or _TEMP_FILE_RE.match(name))
+
+    def evict(self):
+        if not self._evict_lock.acquire(blocking=False):
+            return  # another request is already evicting
+        try:
+            now = time.time()
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not self._owns(entry.name) or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+
+            entries.sort()  # oldest first
+            total = sum(size for _, size, _ in entries)
+
+            for mtime, size, path in entries:
+                age = now - mtime
+                if age < self.MIN_KEEP_SECONDS:
+                    break
+                if age <= self.max_age_seconds and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        finally:
+            self._evict_lock.release()
+
+
+# Singleton instance used by the export router (None when disabled,
+# e.g. on read-only or ephemeral filesystems)
+export_cache = None if not settings.export_cache_enabled else ExportCache(
+    directory=settings.export_dir,
+    max_bytes=settings.export_cache_max_bytes,
+    max_age_seconds=settings.export_cache_max_age_seconds,
+)
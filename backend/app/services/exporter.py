@@ -0,0 +1,331 @@
+# backend/app/services/exporter.py
+
+import asyncio
+import io
+import multiprocessing
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+
+def project_payload(project) -> Dict:
+    """
+    Plain-dict snapshot of a Project with its sections in order. It is
+    picklable, so it can be sent to the render process pool, and it is
+    detached from the DB session.
+    """
+    sections = sorted(project.sections, key=lambda s: (s.order_index, s.id))
+    return {
+        "id": project.id,
+        "name": project.name,
+        "main_topic": project.main_topic,
+        "sections": [
+            {"order_index": s.order_index, "title": s.title, "content": s.content or ""}
+            for s in sections
+        ],
+    }
+
+
+# ---------- Renderers (run inside the process pool) ----------
+
+def render_docx(payload: Dict) -> bytes:
+    from docx import Document  # imported lazily: python-docx slows down worker boot
+
+    doc = Document()
+
+    doc.add_heading(payload["name"], level=1)
+    doc.add_paragraph(f"Main Topic: {payload['main_topic']}")
+    doc.add_paragraph("\n")
+
+    for section in payload["sections"]:
+        doc.add_heading(section["title"], level=2)
+        doc.add_paragraph(section["content"])
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def render_pptx(payload: Dict) -> bytes:
+    from pptx import Presentation  # imported lazily: python-pptx slows down worker boot
+
+    ppt = Presentation()
+
+    # Title slide
+    slide = ppt.slides.add_slide(ppt.slide_layouts[0])
+    title = slide.shapes.title
+    subtitle = slide.placeholders[1]
+
+    title.text = payload["name"]
+    subtitle.text = payload["main_topic"]
+
+    # Content slides
+    for section in payload["sections"]:
+        slide = ppt.slides.add_slide(ppt.slide_layouts[1])
+        title = slide.shapes.title
+        body = slide.placeholders[1]
+
+        title.text = section["title"]
+        body.text = section["content"]
+
+    buf = io.BytesIO()
+    ppt.save(buf)
+    return buf.getvalue()
+
+
+RENDERERS = {
+    "docx": render_docx,
+    "pptx": render_pptx,
+}
+
+
+def render(fmt: str, payload: Dict) -> bytes:
+    return RENDERERS[fmt](payload)
+
+
+def _render_timed(fmt: str, payload: Dict) -> Tuple[bytes, float]:
+    """render() plus the seconds it took, measured where it ran (the worker)."""
+    start = time.perf_counter()
+    data = render(fmt, payload)
+    return data, time.perf_counter() - start
+
+
+def _observe(fmt: str, seconds: float):
+    # Imported here, not at module level: the render workers import this
+    # module and have no use for SQLAlchemy (which metrics pulls in).
+    from app.services.metrics import metrics
+
+    metrics.observe_export(fmt, seconds)
+
+
+def _export_stage():
+    from app.services.metrics import metrics
+
+    return metrics.stage("export")
+
+
+# ---------- Process pool ----------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Shared render pool, created on first use. export_workers = 0 renders
+    in-process instead (handy for debugging and tiny deployments).
+    """
+    global _pool
+    if settings.export_workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # "spawn": forking a process that already runs threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.export_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            # Wait for the workers to exit; with wait=False they outlive the server
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor):
+    """A worker died: drop the pool so the next get_pool() starts a fresh one."""
+    global _pool
+    print("⚠ Export process pool died; recreating it and rendering inline.")
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _render_inline(fmt: str, payload: Dict) -> bytes:
+    data, seconds = _render_timed(fmt, payload)
+    _observe(fmt, seconds)
+    return data
+
+
+def render_in_pool(fmt: str, payload: Dict) -> bytes:
+    """
+    Render off the calling thread's GIL, in a worker process. Blocks the
+    caller (a threadpool thread for sync routes) but not the event loop.
+    """
+    pool = get_pool()
+    with _export_stage():
+        if pool is None:
+            data, seconds = _render_timed(fmt, payload)
+        else:
+            try:
+                data, seconds = pool.submit(_render_timed, fmt, payload).result()
+            except BrokenProcessPool:
+                _discard_broken_pool(pool)
+                data, seconds = _render_timed(fmt, payload)
+    _observe(fmt, seconds)
+    return data
+
+
+async def render_async(fmt: str, payload: Dict) -> bytes:
+    """render_in_pool() for async handlers: awaits the worker process without holding a thread."""
+    pool = get_pool()
+    with _export_stage():
+        if pool is None:
+            data, seconds = await asyncio.to_thread(_render_timed, fmt, payload)
+        else:
+            try:
+                data, seconds = await asyncio.wrap_future(pool.submit(_render_timed, fmt, payload))
+            except BrokenProcessPool:
+                _discard_broken_pool(pool)
+                data, seconds = await asyncio.to_thread(_render_timed, fmt, payload)
+    _observe(fmt, seconds)
+    return data
+
+
+def render_many(
+    fmt: str,
+    payloads: Iterable[Dict],
+    lookup: Optional[Callable[[Dict], Optional[bytes]]] = None,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[Tuple[Dict, bytes]]:
+    """
+    Render many projects across the process pool and yield (payload, bytes)
+    as each one finishes (completion order, not input order).
+
+    `lookup` can return already-rendered bytes (e.g. from the export cache)
+    to skip rendering. At most `max_in_flight` renders are queued at once,
+    so memory stays bounded no matter how many projects are requested.
+
+    If a worker dies, the pool is dropped (the next export gets a fresh
+    one) and the renders still outstanding, plus the rest, are done in
+    this process, so the archive being streamed still completes.
+    """
+    payloads = iter(payloads)
+    pool = get_pool()
+    if pool is None:
+        yield from _render_many_inline(fmt, payloads, lookup)
+        return
+
+    limit = max_in_flight or settings.export_workers * 2
+    pending: Dict[Future, Dict] = {}
+    unsubmitted: List[Dict] = []
+    try:
+        for payload in payloads:
+            data = lookup(payload) if lookup else None
+            if data is not None:
+                yield payload, data
+                continue
+
+            try:
+                pending[pool.submit(_render_timed, fmt, payload)] = payload
+            except BrokenProcessPool:
+                unsubmitted.append(payload)
+                raise
+            while len(pending) >= limit:
+                yield from _drain(fmt, pending, FIRST_COMPLETED)
+
+        while pending:
+            yield from _drain(fmt, pending, FIRST_COMPLETED)
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        leftovers = list(pending.values()) + unsubmitted
+        pending.clear()
+        for payload in leftovers:
+            yield payload, _render_inline(fmt, payload)
+        yield from _render_many_inline(fmt, payloads, lookup)
+    finally:
+        # Client went away mid-download: don't keep rendering for nobody
+        for fut in pending:
+            fut.cancel()
+
+
+def _render_many_inline(
+    fmt: str,
+    payloads: Iterable[Dict],
+    lookup: Optional[Callable[[Dict], Optional[bytes]]],
+) -> Iterator[Tuple[Dict, bytes]]:
+    for payload in payloads:
+        data = lookup(payload) if lookup else None
+        yield payload, data if data is not None else _render_inline(fmt, payload)
+
+
+def _drain(fmt: str, pending: Dict[Future, Dict], return_when) -> Iterator[Tuple[Dict, bytes]]:
+    """
+    Wait for renders to finish and yield them, taking them out of
+    `pending`. If a worker died, raises BrokenProcessPool after the
+    results that did arrive; the lost renders stay in `pending`.
+    """
+    done, _ = wait(list(pending), return_when=return_when)
+    broken = None
+    for fut in done:
+        try:
+            data, seconds = fut.result()
+        except BrokenProcessPool as e:
+            broken = e
+            continue
+        _observe(fmt, seconds)
+        yield pending.pop(fut), data
+    if broken is not None:
+        raise broken
+
+
+class ZipStreamWriter(io.RawIOBase):
+    """
+    Write-only, unseekable sink for zipfile.ZipFile: collects what the zip
+    writer produces so it can be handed to the client chunk by chunk.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive: each (name, data) entry is flushed to the client
+    as soon as it is written, then dropped from memory.
+    DOCX/PPTX are already zip containers, so entries are stored uncompressed.
+    """
+    sink = ZipStreamWriter()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def iter_bytes(data: bytes, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
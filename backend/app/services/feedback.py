@@ -0,0 +1,171 @@
+# backend/app/services/feedback.py
+
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+
+
+class FeedbackBuffer:
+    """
+    Like/dislike votes, written in batches.
+
+    Each vote bumps an in-memory (likes, dislikes) delta for its section and
+    queues a Feedback event row. flush() applies all deltas as atomic
+    `likes = likes + n` UPDATEs (correct across processes, no read-modify-
+    write) and bulk-inserts the events, all in one commit. A background
+    thread flushes every `interval` seconds, or sooner once `max_pending`
+    votes are waiting; interval <= 0 writes each vote as it comes in.
+
+    Votes still in memory are lost if the process dies; stop() flushes them
+    on a clean shutdown.
+    """
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+
+        self._deltas: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+        self._events: List[Dict] = []
+        # Deltas flush() has taken but not committed yet; still "pending"
+        self._in_flight: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.flushes = 0
+        self.flushed_votes = 0
+
+    @property
+    def buffered(self) -> bool:
+        return self.interval > 0
+
+    # ---------- Lifecycle ----------
+
+    def start(self):
+        if not self.buffered or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="feedback-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            thread.join(timeout)
+        try:
+            self.flush()
+        except Exception as e:
+            print("⚠ Final feedback flush failed; buffered votes were lost:", repr(e))
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print("⚠ Feedback flush failed; votes kept for the next try:", repr(e))
+
+    # ---------- Votes ----------
+
+    def record(self, section_id: int, is_like: bool):
+        event = {"section_id": section_id, "is_like": is_like, "created_at": datetime.utcnow()}
+        if not self.buffered:
+            self._write({section_id: [int(is_like), int(not is_like)]}, [event])
+            return
+
+        with self._lock:
+            self._deltas[section_id][0 if is_like else 1] += 1
+            self._events.append(event)
+            pending = len(self._events)
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def pending(self, section_id: int) -> Tuple[int, int]:
+        """Votes for this section not yet written to the DB (likes, dislikes)."""
+        with self._lock:
+            likes = dislikes = 0
+            for deltas in (self._deltas, self._in_flight):
+                delta = deltas.get(section_id)
+                if delta:
+                    likes += delta[0]
+                    dislikes += delta[1]
+            return likes, dislikes
+
+    def flush(self) -> int:
+        """Write all buffered votes in one transaction; returns how many."""
+        with self._flush_lock:
+            with self._lock:
+                deltas, self._deltas = self._deltas, defaultdict(lambda: [0, 0])
+                events, self._events = self._events, []
+                self._in_flight = deltas
+            if not events:
+                return 0
+            try:
+                self._write(deltas, events)
+            except Exception:
+                self._requeue(deltas, events)
+                raise
+            return len(events)
+
+    def _write(self, deltas: Dict[int, List[int]], events: List[Dict]):
+        sections = models.Section.__table__
+        db = SessionLocal()
+        try:
+            db.execute(
+                sections.update()
+                .where(sections.c.id == bindparam("sid"))
+                .values(
+                    likes=sections.c.likes + bindparam("d_likes"),
+                    dislikes=sections.c.dislikes + bindparam("d_dislikes"),
+                    version=sections.c.version + 1,
+                ),
+                [
+                    {"sid": sid, "d_likes": likes, "d_dislikes": dislikes}
+                    for sid, (likes, dislikes) in deltas.items()
+                ],
+            )
+            # Counts are part of the section (and project) representation
+            projects = models.Project.__table__
+            db.execute(
+                projects.update()
+                .where(projects.c.id.in_(select(sections.c.project_id).where(sections.c.id.in_(list(deltas)))))
+                .values(version=projects.c.version + 1)
+            )
+            db.execute(insert(models.Feedback.__table__), events)
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            # Committed: section.likes/dislikes now include these
+            if self._in_flight is deltas:
+                self._in_flight = {}
+            self.flushes += 1
+            self.flushed_votes += len(events)
+
+    def _requeue(self, deltas: Dict[int, List[int]], events: List[Dict]):
+        with self._lock:
+            self._in_flight = {}
+            for sid, (likes, dislikes) in deltas.items():
+                self._deltas[sid][0] += likes
+                self._deltas[sid][1] += dislikes
+            self._events[:0] = events
+
+
+# Singleton instance, started/stopped by app.main
+feedback_buffer = FeedbackBuffer(
+    interval=settings.feedback_flush_interval_seconds,
+    max_pending=settings.feedback_flush_max_pending,
+)
@@ -0,0 +1,193 @@
+# backend/app/services/history.py
+
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+
+# Diffing is quadratic in the worst case; past this many token pairs a
+# version is simply stored as a keyframe.
+MAX_DIFF_WORK = 4_000_000
+
+_TOKEN_RE = re.compile(r"\s+|\S+")
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_text(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+# ---------- Deltas ----------
+
+def _tokens(text: str) -> List[str]:
+    # Words and the whitespace between them; "".join() gives the text back exactly
+    return _TOKEN_RE.findall(text)
+
+
+def make_delta(base: str, new: str) -> Optional[bytes]:
+    """
+    Compressed diff turning `base` into `new`: a JSON list whose items are
+    either [start, end] (copy base tokens start..end) or a literal string.
+    Returns None when the texts are too large to diff cheaply.
+    """
+    a, b = _tokens(base), _tokens(new)
+    if len(a) * len(b) > MAX_DIFF_WORK:
+        return None
+
+    ops = []
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return zlib.compress(json.dumps(ops, ensure_ascii=False).encode("utf-8"), 6)
+
+
+def apply_delta(base: str, blob: bytes) -> str:
+    a = _tokens(base)
+    out = []
+    for op in json.loads(zlib.decompress(blob)):
+        if isinstance(op, str):
+            out.append(op)
+        else:
+            out.extend(a[op[0]:op[1]])
+    return "".join(out)
+
+
+def encode(
+    old: str,
+    new: str,
+    prev_id: Optional[int] = None,
+    prev_depth: int = 0,
+    prev_text: Optional[str] = None,
+) -> Dict:
+    """
+    Column values for a compactly stored refinement.
+
+    When `old` is exactly the previous version's text (`prev_text`), the old
+    side costs nothing (it is the base row's text) and the new side is a diff
+    against it, unless the chain is due for a keyframe or the diff wouldn't
+    be smaller than the compressed full text.
+    """
+    follows = prev_id is not None and prev_text == old
+    values = {
+        "old_content": None,
+        "new_content": None,
+        "base_id": prev_id if follows else None,
+        "old_blob": None if follows else compress_text(old),
+    }
+
+    keyframe = compress_text(new)
+    interval = max(1, settings.refinement_keyframe_interval)
+    if follows and prev_depth + 1 < interval:
+        delta = make_delta(prev_text, new)
+        if delta is not None and len(delta) < len(keyframe):
+            values.update(storage="delta", content_blob=delta, chain_depth=prev_depth + 1)
+            return values
+
+    values.update(storage="key", content_blob=keyframe, chain_depth=0)
+    return values
+
+
+# ---------- Reading ----------
+
+def text_of(db: Session, row: models.Refinement) -> str:
+    """The section text right after `row` was applied."""
+    chain = []
+    while row.storage == "delta":
+        chain.append(row)
+        row = db.get(models.Refinement, row.base_id)
+
+    if row.storage == "key":
+        text = decompress_text(row.content_blob)
+    else:  # legacy, not compacted yet
+        text = row.new_content or ""
+
+    for delta_row in reversed(chain):
+        text = apply_delta(text, delta_row.content_blob)
+    return text
+
+
+def old_text_of(db: Session, row: models.Refinement) -> str:
+    """The section text right before `row` was applied."""
+    if row.storage is None:
+        return row.old_content or ""
+    if row.old_blob is not None:
+        return decompress_text(row.old_blob)
+    return text_of(db, db.get(models.Refinement, row.base_id))
+
+
+def _history_query(db: Session, section_id: int):
+    return (
+        db.query(models.Refinement)
+        .filter(models.Refinement.section_id == section_id)
+        .order_by(models.Refinement.id)
+    )
+
+
+def count_versions(db: Session, section_id: int) -> int:
+    return (
+        db.query(func.count(models.Refinement.id))
+        .filter(models.Refinement.section_id == section_id)
+        .scalar()
+    )
+
+
+def list_history(
+    db: Session, section_id: int, offset: int, limit: int
+) -> List[Tuple[int, models.Refinement]]:
+    """(version, refinement) pairs; version N is the text after the N-th refinement."""
+    rows = _history_query(db, section_id).offset(offset).limit(limit).all()
+    return [(offset + i + 1, row) for i, row in enumerate(rows)]
+
+
+def version_text(db: Session, section_id: int, version: int) -> Optional[str]:
+    """
+    Rebuild one version of a section: 0 is the text before the first
+    refinement. Costs at most refinement_keyframe_interval row reads.
+    """
+    if version < 0:
+        return None
+    row = _history_query(db, section_id).offset(max(version - 1, 0)).first()
+    if row is None:
+        return None
+    return old_text_of(db, row) if version == 0 else text_of(db, row)
+
+
+# ---------- Writing ----------
+
+def record_refinement(
+    db: Session, section_id: int, prompt: str, old: str, new: str
+) -> models.Refinement:
+    """Add (but don't commit) a compactly stored Refinement row."""
+    prev = (
+        db.query(models.Refinement)
+        .filter(models.Refinement.section_id == section_id)
+        .order_by(models.Refinement.id.desc())
+        .first()
+    )
+    if prev is None:
+        values = encode(old, new)
+    else:
+        values = encode(
+            old,
+            new,
+            prev_id=prev.id,
+            prev_depth=prev.chain_depth or 0,
+            prev_text=text_of(db, prev),
+        )
+
+    refinement = models.Refinement(section_id=section_id, prompt=prompt, **values)
+    db.add(refinement)
+    return refinement
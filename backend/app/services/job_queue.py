@@ -0,0 +1,197 @@
+# backend/app/services/job_queue.py
+
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import or_, update
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.services.llm_service import llm_service
+
+
+class JobQueue:
+    """
+    In-process worker pool that fills in Section.content for background
+    project-creation jobs.
+
+    The queue itself only holds task ids; the source of truth is the
+    generation_tasks table, so unfinished work is picked up again by
+    resume_unfinished() after a restart.
+    """
+
+    def __init__(self, workers: int = settings.job_workers):
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    # ---------- Lifecycle ----------
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+        resumed = self.resume_unfinished()
+        if resumed:
+            print(f"↻ Resumed {resumed} unfinished generation task(s).")
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(timeout)
+
+    # ---------- Enqueueing ----------
+
+    def enqueue_job(self, job_id: int):
+        db = SessionLocal()
+        try:
+            task_ids = [
+                t.id
+                for t in db.query(models.GenerationTask.id)
+                .filter(
+                    models.GenerationTask.job_id == job_id,
+                    models.GenerationTask.status == "pending",
+                )
+                .order_by(models.GenerationTask.id)
+            ]
+        finally:
+            db.close()
+
+        for task_id in task_ids:
+            self._queue.put(task_id)
+
+    def resume_unfinished(self) -> int:
+        """
+        Re-queue pending tasks, plus "running" tasks whose lease expired
+        (their worker died before finishing).
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.job_task_lease_seconds)
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(models.GenerationTask)
+                .where(
+                    models.GenerationTask.status == "running",
+                    or_(
+                        models.GenerationTask.claimed_at.is_(None),
+                        models.GenerationTask.claimed_at < stale_before,
+                    ),
+                )
+                .values(status="pending", claimed_at=None)
+            )
+            db.commit()
+
+            task_ids = [
+                t.id
+                for t in db.query(models.GenerationTask.id)
+                .filter(models.GenerationTask.status == "pending")
+                .order_by(models.GenerationTask.id)
+            ]
+        finally:
+            db.close()
+
+        for task_id in task_ids:
+            self._queue.put(task_id)
+        return len(task_ids)
+
+    # ---------- Workers ----------
+
+    def _worker(self):
+        while True:
+            task_id = self._queue.get()
+            if task_id is None:
+                return
+            try:
+                self._run_task(task_id)
+            except Exception as e:
+                print(f"⚠ Generation task {task_id} crashed:", repr(e))
+
+    def _claim(self, db, task_id: int) -> bool:
+        # Atomic pending -> running transition, so a task queued twice
+        # (or seen by two processes) is only generated once.
+        res = db.execute(
+            update(models.GenerationTask)
+            .where(
+                models.GenerationTask.id == task_id,
+                models.GenerationTask.status == "pending",
+            )
+            .values(
+                status="running",
+                attempts=models.GenerationTask.attempts + 1,
+                claimed_at=datetime.utcnow(),
+            )
+        )
+        db.commit()
+        return res.rowcount == 1
+
+    def _run_task(self, task_id: int):
+        db = SessionLocal()
+        try:
+            if not self._claim(db, task_id):
+                return
+
+            task = db.get(models.GenerationTask, task_id)
+            section = task.section
+            project = section.project
+
+            try:
+                section.content = llm_service.generate_section(
+                    main_topic=project.main_topic,
+                    section_title=section.title,
+                    strict=True,
+                )
+                task.status = "done"
+                task.error = None
+            except Exception as e:
+                # Keep the section readable, but report the failure in the job status
+                section.content = llm_service._fallback_section(project.main_topic, section.title)
+                task.status = "failed"
+                task.error = repr(e)
+
+            db.commit()
+            self._refresh_job(db, task.job_id)
+        finally:
+            db.close()
+
+    def _refresh_job(self, db, job_id: int):
+        # Runs in a fresh transaction after the task commit. The updates are
+        # conditional so a slower worker can never move a finished job back
+        # to "running".
+        statuses = [
+            t.status
+            for t in db.query(models.GenerationTask.status).filter(
+                models.GenerationTask.job_id == job_id
+            )
+        ]
+        Job = models.GenerationJob
+
+        if all(s in ("done", "failed") for s in statuses):
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status != "done")
+                .values(status="done", finished_at=datetime.utcnow())
+            )
+        else:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="running")
+            )
+        db.commit()
+
+
+# Singleton instance, started/stopped by app.main
+job_queue = JobQueue()
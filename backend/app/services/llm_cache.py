@@ -0,0 +1,231 @@
+# backend/app/services/llm_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_text(value: str, casefold: bool = False) -> str:
+    """
+    Collapse whitespace (and optionally case) so trivially different
+    inputs map to the same cache key.
+    """
+    text = " ".join((value or "").split())
+    return text.casefold() if casefold else text
+
+
+def make_cache_key(kind: str, model_name: str, template_version: str, **inputs: str) -> str:
+    """
+    Content-addressed key: sha256 over the model, prompt template version
+    and the (already normalized) inputs.
+    """
+    payload = json.dumps(
+        {"kind": kind, "model": model_name, "template": template_version, "inputs": inputs},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM responses:
+    - a bounded in-memory LRU with TTL (per process),
+    - an optional SQLite file shared by all uvicorn workers on the host.
+      Every `disk_prune_every` writes (per process) it drops expired rows,
+      then the soonest-expiring ones until at most `disk_max_entries` remain.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: int = 86400,
+        db_path: Optional[str] = None,
+        disk_max_entries: int = 20000,
+        disk_prune_every: int = 100,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.disk_max_entries = max(1, disk_max_entries)
+        self.disk_prune_every = max(1, disk_prune_every)
+        self._disk_writes = 0
+
+        self._memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.disk_pruned = 0
+
+        if self.db_path:
+            try:
+                self._init_disk()
+            except Exception as e:
+                print("⚠ LLM disk cache unavailable; using memory only:", repr(e))
+                self.db_path = None
+
+    # ---------- Disk tier ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_disk(self):
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_expires_at ON llm_cache (expires_at)")
+        conn.commit()
+        self._disk_prune()
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple[float, str]]:
+        try:
+            row = self._conn().execute(
+                "SELECT expires_at, value FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print("⚠ LLM disk cache read failed:", repr(e))
+            return None
+        return (row[0], row[1]) if row else None
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print("⚠ LLM disk cache write failed:", repr(e))
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            due = self._disk_writes % self.disk_prune_every == 0
+        if due:
+            self._disk_prune()
+
+    def _disk_prune(self):
+        try:
+            conn = self._conn()
+            removed = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            removed += conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY expires_at"
+                " LIMIT max(0, (SELECT count(*) FROM llm_cache) - ?))",
+                (self.disk_max_entries,),
+            ).rowcount
+            conn.commit()
+        except sqlite3.Error as e:
+            print("⚠ LLM disk cache prune failed:", repr(e))
+            return
+        with self._lock:
+            self.disk_pruned += removed
+
+    def _disk_stats(self) -> dict:
+        try:
+            entries = self._conn().execute("SELECT count(*) FROM llm_cache").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        # The file plus its WAL: what the cache actually takes on disk
+        size = 0
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return {"disk_entries": entries, "disk_bytes": size}
+
+    # ---------- Public API ----------
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self.db_path:
+            entry = self._disk_get(key, now)
+            if entry is not None:
+                with self._lock:
+                    self._memory_put(key, entry)
+                    self.disk_hits += 1
+                return entry[1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._memory_put(key, (expires_at, value))
+        if self.db_path:
+            self._disk_set(key, value, expires_at)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def _memory_put(self, key: str, entry: tuple[float, str]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            try:
+                conn = self._conn()
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+            except sqlite3.Error as e:
+                print("⚠ LLM disk cache clear failed:", repr(e))
+
+    def stats(self) -> dict:
+        disk = self._disk_stats() if self.db_path else {"disk_entries": 0, "disk_bytes": 0}
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": bool(self.db_path),
+                "disk_max_entries": self.disk_max_entries,
+                "disk_pruned": self.disk_pruned,
+                **disk,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
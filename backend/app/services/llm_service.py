@@ -1,25 +1,232 @@
 # backend/app/services/llm_service.py
 
+import asyncio
+import contextvars
+import importlib.util
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+
 from app.config import settings
+from app.services.llm_cache import LLMCache, make_cache_key, normalize_text
+from app.services.metrics import metrics
+from app.services.rate_limit import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitedError,
+    RateLimiter,
+    backoff_delay,
+    is_quota_error,
+    is_retryable_error,
+)
+from app.services.singleflight import SingleFlight
 
+# google.generativeai takes about a second to import, so it is only imported
+# when the model is actually initialized (see LLMService._initialize).
+genai = None
 try:
-    import google.generativeai as genai
-    HAS_GEMINI = True
-except ImportError:
-    genai = None
+    HAS_GEMINI = importlib.util.find_spec("google.generativeai") is not None
+except ModuleNotFoundError:
     HAS_GEMINI = False
 
 
+# Bump these whenever a prompt template changes, so cached responses
+# produced by the old wording are no longer served.
+SECTION_PROMPT_VERSION = "section-v1"
+REFINE_PROMPT_VERSION = "refine-v1"
+
+# These are good text models from your list_models output
+CANDIDATE_MODELS = [
+    "models/gemini-flash-latest",
+    "models/gemini-2.5-flash",
+    "models/gemini-2.0-flash",
+]
+
+
+class StreamInterruptedError(Exception):
+    """stream_refine() failed after some of the new text was already yielded."""
+
+
+class GenerationFailedError(Exception):
+    """generate_section(strict=True) got no usable text from Gemini."""
+
+
+# Neighbouring text shown with each part of a chunked refinement, in chars
+REFINE_CONTEXT_CHARS = 600
+# Parts are never planned smaller than this, however tight the budget
+MIN_REFINE_PART_TOKENS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 chars/token), used for the TPM budget and for
+    sizing refinement parts; avoids a count_tokens round-trip per call.
+    """
+    return len(text) // 4 + 1
+
+
+def _pack(units: List[str], max_tokens: int, joiner: str) -> List[str]:
+    """Greedily join consecutive units into groups of at most ~max_tokens."""
+    groups: List[str] = []
+    current: List[str] = []
+    chars = 0
+    for unit in units:
+        grown = chars + len(joiner) + len(unit) if current else len(unit)
+        if current and grown // 4 + 1 > max_tokens:
+            groups.append(joiner.join(current))
+            current, grown = [], len(unit)
+        current.append(unit)
+        chars = grown
+    if current:
+        groups.append(joiner.join(current))
+    return groups
+
+
+def split_paragraphs(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into parts of at most ~max_tokens, breaking only between
+    paragraphs. A paragraph too long on its own is broken between sentences
+    (or, for a runaway sentence, between words), so it comes back as
+    several paragraphs once the parts are joined with blank lines.
+    """
+    units: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        sentences: List[str] = []
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                sentences.append(sentence)
+            else:
+                sentences.extend(_pack(sentence.split(" "), max_tokens, " "))
+        units.extend(_pack(sentences, max_tokens, " "))
+    return _pack(units, max_tokens, "\n\n")
+
+
+def parse_outline(text: str, section_titles: List[str]) -> Dict[int, str]:
+    """
+    Pull the sections out of a batched outline reply.
+
+    The reply should be a JSON object keyed by the 1-based section numbers
+    from the prompt; exact section titles are accepted as keys too, and a
+    ```json fence or chatter around the object is ignored. Values must be
+    non-empty strings (or {"content": "..."}). Returns {0-based index:
+    content}; anything missing or malformed is simply absent.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if isinstance(data.get("sections"), dict):
+        data = data["sections"]
+
+    by_title: Dict[str, List[int]] = {}
+    for i, title in enumerate(section_titles):
+        by_title.setdefault(normalize_text(title, casefold=True), []).append(i)
+
+    found: Dict[int, str] = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            value = value.get("content")
+        if not isinstance(value, str) or not value.strip():
+            continue
+        key = str(key).strip().rstrip(".")
+        if key.isdigit():
+            i = int(key) - 1
+        else:
+            # Titles only identify a section when they are unique in the outline
+            matches = by_title.get(normalize_text(key, casefold=True), [])
+            i = matches[0] if len(matches) == 1 else -1
+        if 0 <= i < len(section_titles) and i not in found:
+            found[i] = value.strip()
+    return found
+
+
 class LLMService:
     """
     LLM service that tries real Gemini models first.
     If no model works, it falls back to structured stub text
     (so your app and exports still look good for the assignment).
+
+    Model selection is lazy: nothing touches the network at import time.
+    The app starts it in the background on startup (start_background_init),
+    and the first call that needs the model waits for it if it hasn't finished.
     """
 
     def __init__(self):
-        self.model = None
+        self._model = None
         self.model_name = None
+        self.cache = None
+        self.inflight = SingleFlight()
+        self.limiter = RateLimiter(rpm=settings.llm_rpm, tpm=settings.llm_tpm)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            reset_timeout=settings.llm_breaker_reset_seconds,
+            half_open_max_calls=settings.llm_breaker_half_open_probes,
+        )
+
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+        if settings.llm_cache_enabled:
+            self.cache = LLMCache(
+                max_entries=settings.llm_cache_max_entries,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                db_path=settings.llm_cache_db_path,
+                disk_max_entries=settings.llm_cache_disk_max_entries,
+                disk_prune_every=settings.llm_cache_disk_prune_every,
+            )
+
+    # ---------- Lazy initialization ----------
+
+    @property
+    def model(self):
+        if not self._initialized:
+            self._ensure_initialized()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        # Lets tests/benchmarks plug in their own model object
+        self._model = value
+        self._initialized = True
+
+    @property
+    def mode(self) -> str:
+        if not self._initialized:
+            return "initializing"
+        return "live" if self._model else "stub"
+
+    def start_background_init(self) -> threading.Thread:
+        t = threading.Thread(target=self._ensure_initialized, name="llm-init", daemon=True)
+        t.start()
+        return t
+
+    def _ensure_initialized(self):
+        with self._init_lock:
+            if self._initialized:
+                return
+            try:
+                self._initialize()
+            finally:
+                self._initialized = True
+
+    def _initialize(self):
+        global genai
 
         if not HAS_GEMINI:
             print("⚠ google.generativeai not installed; using stub mode.")
@@ -31,33 +238,74 @@ class LLMService:
 
         # Configure Gemini with your key
         try:
+            import google.generativeai as genai
             genai.configure(api_key=settings.gemini_api_key)
         except Exception as e:
             print("⚠ Failed to configure Gemini; using stub mode:", e)
             return
 
-        # These are good text models from your list_models output
-        candidate_models = [
-            "models/gemini-flash-latest",
-            "models/gemini-2.5-flash",
-            "models/gemini-2.0-flash",
-        ]
+        # A recent successful probe lets restarts skip the network round-trips
+        cached_name = self._read_cached_model_name()
+        if cached_name:
+            try:
+                self._model = genai.GenerativeModel(cached_name)
+                self.model_name = cached_name
+                print(f"✅ Gemini model initialized (cached choice): {cached_name}")
+                return
+            except Exception as e:
+                print(f"⚠ Cached model not usable: {cached_name} -> {e}")
 
-        for name in candidate_models:
+        for name in CANDIDATE_MODELS:
             try:
                 test_model = genai.GenerativeModel(name)
                 # quick lightweight check
                 test_model.count_tokens("Hello from AI Doc Platform")
-                self.model = test_model
+                self._model = test_model
                 self.model_name = name
+                self._write_cached_model_name(name)
                 print(f"✅ Gemini model initialized: {name}")
                 break
             except Exception as e:
                 print(f"⚠ Model not usable: {name} -> {e}")
 
-        if not self.model:
+        if not self._model:
             print("⚠ No usable Gemini model found; using stub mode.")
 
+    def _read_cached_model_name(self) -> Optional[str]:
+        path = settings.llm_model_cache_path
+        if not path:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        name = data.get("model_name")
+        fresh = time.time() - float(data.get("probed_at", 0)) < settings.llm_model_cache_ttl_seconds
+        if fresh and name in CANDIDATE_MODELS:
+            return name
+        return None
+
+    def _write_cached_model_name(self, name: str):
+        path = settings.llm_model_cache_path
+        if not path:
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"model_name": name, "probed_at": time.time()}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print("⚠ Could not cache chosen model:", repr(e))
+
+    def status(self) -> dict:
+        return {
+            "ready": self._initialized,
+            "mode": self.mode,
+            "model": self.model_name,
+        }
+
     # ---------- Fallback helpers ----------
 
     def _fallback_section(self, main_topic: str, section_title: str) -> str:
@@ -84,13 +332,138 @@ class LLMService:
                 "Please generate or write some text first."
             )
 
+        return f"{original}\n\n{self._fallback_refine_note(refinement_prompt)}"
+
+    def _fallback_refine_note(self, refinement_prompt: str) -> str:
         return (
-            f"{original}\n\n"
             f"(Note: A refinement was requested: \"{refinement_prompt}\", "
             f"but the live AI service was not available. The original text "
             f"is shown here with minimal changes.)"
         )
 
+    # ---------- Model call + cache helpers ----------
+
+    def _call_model(self, prompt: str) -> str:
+        """
+        Single place where Gemini is actually called.
+        Returns the stripped response text ("" if empty); raises on API errors.
+
+        Identical prompts that are already in flight (double-clicked Refine,
+        several tabs on one section) share the same upstream call.
+        """
+        key = make_cache_key("prompt", self.model_name, "", prompt=prompt)
+        return self.inflight.do(key, lambda: self._call_model_uncoalesced(prompt))
+
+    def _call_model_uncoalesced(self, prompt: str) -> str:
+        token_estimate = estimate_tokens(prompt)
+
+        attempt = 0
+        while True:
+            self._admit(token_estimate)
+            try:
+                res = self.model.generate_content(prompt)
+                text = (res.text or "").strip()
+            except Exception as e:
+                self._record_failure(e)
+                if not is_retryable_error(e) or attempt >= settings.llm_max_retries:
+                    raise
+                time.sleep(
+                    backoff_delay(attempt, settings.llm_retry_base_delay, settings.llm_retry_max_delay)
+                )
+                attempt += 1
+                continue
+
+            self._record_success()
+            return text
+
+    def _admit(self, token_estimate: int):
+        """
+        Gate every upstream call: refuse straight away while the breaker is
+        open, otherwise wait (bounded) for rate-limit capacity.
+        Callers treat the raised errors like any other Gemini failure.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit breaker is open")
+        if not self.limiter.acquire(token_estimate, timeout=settings.llm_rate_limit_wait_seconds):
+            self.breaker.release()
+            raise RateLimitedError("Gemini rate limit budget exhausted")
+
+    def _record_success(self):
+        self.breaker.record_success()
+        self.limiter.on_success()
+
+    def _record_failure(self, e: Exception):
+        if is_quota_error(e):
+            self.limiter.on_throttled()
+        # Only upstream trouble counts towards opening the breaker; a bad
+        # request still proves Gemini is reachable.
+        if is_retryable_error(e):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    # ---------- Async model call (async_mode routes) ----------
+
+    async def _amodel(self):
+        # Model selection may still be probing the network: wait for it
+        # on a thread instead of blocking the event loop.
+        if not self._initialized:
+            await asyncio.to_thread(self._ensure_initialized)
+        return self._model
+
+    async def _acall_model(self, prompt: str) -> str:
+        """
+        Async twin of _call_model(): shares the same single-flight table,
+        rate limiter and circuit breaker, but never blocks the event loop.
+        """
+        key = make_cache_key("prompt", self.model_name, "", prompt=prompt)
+        return await self.inflight.do_async(key, partial(self._acall_model_uncoalesced, prompt))
+
+    async def _acall_model_uncoalesced(self, prompt: str) -> str:
+        token_estimate = estimate_tokens(prompt)
+        model = await self._amodel()
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Gemini circuit breaker is open")
+            if not await self.limiter.acquire_async(
+                token_estimate, timeout=settings.llm_rate_limit_wait_seconds
+            ):
+                self.breaker.release()
+                raise RateLimitedError("Gemini rate limit budget exhausted")
+
+            try:
+                if hasattr(model, "generate_content_async"):
+                    res = await model.generate_content_async(prompt)
+                else:
+                    res = await asyncio.to_thread(model.generate_content, prompt)
+                text = (res.text or "").strip()
+            except Exception as e:
+                self._record_failure(e)
+                if not is_retryable_error(e) or attempt >= settings.llm_max_retries:
+                    raise
+                await asyncio.sleep(
+                    backoff_delay(attempt, settings.llm_retry_base_delay, settings.llm_retry_max_delay)
+                )
+                attempt += 1
+                continue
+
+            self._record_success()
+            return text
+
+    def _cache_lookup(self, key: Optional[str], use_cache: bool) -> Optional[str]:
+        if not self.cache or not key:
+            return None
+        if not use_cache:
+            self.cache.record_bypass()
+            return None
+        return self.cache.get(key)
+
+    def _cache_store(self, key: Optional[str], value: str):
+        if self.cache and key:
+            self.cache.set(key, value)
+
     # ---------- Generic text generation (optional) ----------
 
     def generate_text(self, prompt: str) -> str:
@@ -98,24 +471,25 @@ class LLMService:
         General-purpose text generation. Not heavily used in your current app,
         but kept for completeness.
         """
-        if not self.model:
-            return "[AI stub response]\n" + prompt
+        model = self.model
+        with metrics.llm_span("generate_text", self.model_name) as span:
+            if not model:
+                span.outcome = "stub"
+                return "[AI stub response]\n" + prompt
 
-        try:
-            res = self.model.generate_content(prompt)
-            text = (res.text or "").strip()
-            return text or "[Empty AI response]"
-        except Exception as e:
-            print("⚠ Gemini generate_text error:", repr(e))
-            return "[AI generation temporarily unavailable]"
+            try:
+                text = self._call_model(prompt)
+                span.tokens(prompt, text)
+                return text or "[Empty AI response]"
+            except Exception as e:
+                print("⚠ Gemini generate_text error:", repr(e))
+                span.outcome = "fallback"
+                return "[AI generation temporarily unavailable]"
 
     # ---------- Section generation for new projects ----------
 
-    def generate_section(self, main_topic: str, section_title: str) -> str:
-        """
-        Used during initial project creation to generate content for each section.
-        """
-        prompt = (
+    def _section_prompt(self, main_topic: str, section_title: str) -> str:
+        return (
             "Write a clear, structured section for a document.\n\n"
             f"Main topic: {main_topic}\n"
             f"Section title: {section_title}\n\n"
@@ -125,34 +499,337 @@ class LLMService:
             "- Explain the idea in a way a beginner can understand.\n"
         )
 
-        if not self.model:
-            # Stub mode
+    def _section_cache_key(self, main_topic: str, section_title: str) -> str:
+        return make_cache_key(
+            "section",
+            self.model_name,
+            SECTION_PROMPT_VERSION,
+            main_topic=normalize_text(main_topic, casefold=True),
+            section_title=normalize_text(section_title, casefold=True),
+        )
+
+    def generate_section(
+        self, main_topic: str, section_title: str, use_cache: bool = True, strict: bool = False
+    ) -> str:
+        """
+        Used during initial project creation to generate content for each section.
+        Live responses are cached; pass use_cache=False to force a fresh call.
+        With strict=True a failed Gemini call raises GenerationFailedError
+        instead of returning the fallback text (stub mode still returns it).
+        """
+        model = self.model
+        with metrics.llm_span("generate_section", self.model_name) as span:
+            if not model:
+                # Stub mode
+                span.outcome = "stub"
+                return self._fallback_section(main_topic, section_title)
+
+            key = self._section_cache_key(main_topic, section_title)
+            cached = self._cache_lookup(key, use_cache)
+            if cached is not None:
+                span.outcome = "cache_hit"
+                return cached
+
+            prompt = self._section_prompt(main_topic, section_title)
+            error = None
+            try:
+                text = self._call_model(prompt)
+                if text:
+                    span.tokens(prompt, text)
+                    self._cache_store(key, text)
+                    return text
+            except Exception as e:
+                print("⚠ Gemini generate_section error:", repr(e))
+                error = e
+
+            # If Gemini fails, still return something useful
+            span.outcome = "fallback"
+            if strict:
+                raise GenerationFailedError(repr(error) if error else "Gemini returned no text") from error
             return self._fallback_section(main_topic, section_title)
 
+    def _generate_section_safe(self, main_topic: str, section_title: str, use_cache: bool = True) -> str:
+        """
+        generate_section() for use in worker threads: any unexpected error
+        falls back for this section only, so the other sections still finish.
+        """
         try:
-            res = self.model.generate_content(prompt)
-            text = (res.text or "").strip()
-            if text:
-                return text
+            return self.generate_section(main_topic, section_title, use_cache=use_cache)
         except Exception as e:
-            print("⚠ Gemini generate_section error:", repr(e))
+            print(f"⚠ Section generation failed for {section_title!r}:", repr(e))
+            return self._fallback_section(main_topic, section_title)
+
+    def generate_sections(
+        self,
+        main_topic: str,
+        section_titles: List[str],
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+        mode: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Generate several sections; results are returned in the same order as
+        section_titles. `mode` (default: settings.llm_outline_mode) is
+        "per_section" for one prompt per section or "batched" for one JSON
+        prompt per batch of sections (see generate_outline).
+        """
+        if (mode or settings.llm_outline_mode) == "batched" and len(section_titles) > 1:
+            return self.generate_outline(main_topic, section_titles, max_concurrency, use_cache)
+        return self._generate_each(main_topic, section_titles, max_concurrency, use_cache)
+
+    def _generate_each(
+        self,
+        main_topic: str,
+        section_titles: List[str],
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> List[str]:
+        """One generate_section() per title, concurrently on a thread pool."""
+        if not section_titles:
+            return []
 
-        # If Gemini fails, still return something useful
-        return self._fallback_section(main_topic, section_title)
+        limit = max_concurrency or settings.llm_max_concurrency
+        workers = max(1, min(limit, len(section_titles)))
+
+        if workers == 1:
+            return [self._generate_section_safe(main_topic, t, use_cache) for t in section_titles]
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-section") as pool:
+            # A context copy per task keeps the calls in this request's metrics trace
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._generate_section_safe, main_topic, t, use_cache)
+                for t in section_titles
+            ]
+            return [f.result() for f in futures]
+
+    async def agenerate_section(
+        self, main_topic: str, section_title: str, use_cache: bool = True
+    ) -> str:
+        """Async generate_section(); any error falls back for this section only."""
+        model = await self._amodel()
+        with metrics.llm_span("generate_section", self.model_name) as span:
+            if not model:
+                span.outcome = "stub"
+                return self._fallback_section(main_topic, section_title)
+
+            key = self._section_cache_key(main_topic, section_title)
+            cached = self._cache_lookup(key, use_cache)
+            if cached is not None:
+                span.outcome = "cache_hit"
+                return cached
+
+            prompt = self._section_prompt(main_topic, section_title)
+            try:
+                text = await self._acall_model(prompt)
+                if text:
+                    span.tokens(prompt, text)
+                    self._cache_store(key, text)
+                    return text
+            except Exception as e:
+                print("⚠ Gemini agenerate_section error:", repr(e))
+
+            span.outcome = "fallback"
+            return self._fallback_section(main_topic, section_title)
+
+    async def agenerate_sections(
+        self,
+        main_topic: str,
+        section_titles: List[str],
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+        mode: Optional[str] = None,
+    ) -> List[str]:
+        """Async generate_sections()."""
+        if (mode or settings.llm_outline_mode) == "batched" and len(section_titles) > 1:
+            return await self.agenerate_outline(main_topic, section_titles, max_concurrency, use_cache)
+        return await self._agenerate_each(main_topic, section_titles, max_concurrency, use_cache)
+
+    async def _agenerate_each(
+        self,
+        main_topic: str,
+        section_titles: List[str],
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> List[str]:
+        """Async _generate_each(): asyncio tasks bounded by a semaphore."""
+        limit = asyncio.Semaphore(max(1, max_concurrency or settings.llm_max_concurrency))
+
+        async def one(title: str) -> str:
+            async with limit:
+                return await self.agenerate_section(main_topic, title, use_cache)
+
+        return list(await asyncio.gather(*(one(t) for t in section_titles)))
+
+    # ---------- Whole-outline generation (llm_outline_mode = "batched") ----------
+
+    def _outline_prompt(self, main_topic: str, section_titles: List[str]) -> str:
+        # Asks for the same sections as _section_prompt (results share its
+        # cache keys), so bump SECTION_PROMPT_VERSION when either changes.
+        numbered = "\n".join(f"{i}. {title}" for i, title in enumerate(section_titles, 1))
+        return (
+            "Write every section of a document.\n\n"
+            f"Main topic: {main_topic}\n"
+            "Sections:\n"
+            f"{numbered}\n\n"
+            "Requirements for each section:\n"
+            "- 2–3 short paragraphs\n"
+            "- Simple and professional tone\n"
+            "- Explain the idea in a way a beginner can understand.\n\n"
+            "Reply with only a JSON object that maps each section number (as a string) "
+            'to the text of that section, e.g. {"1": "...", "2": "..."}. '
+            "Separate paragraphs with blank lines.\n"
+        )
+
+    def _outline_start(self, main_topic: str, section_titles: List[str], use_cache: bool):
+        """Cached sections filled in, and the rest split into prompt-sized batches."""
+        results: List[Optional[str]] = [
+            self._cache_lookup(self._section_cache_key(main_topic, t), use_cache) for t in section_titles
+        ]
+        missing = [i for i, text in enumerate(results) if text is None]
+        size = max(1, settings.llm_outline_batch_size)
+        batches = [missing[i:i + size] for i in range(0, len(missing), size)]
+        return results, batches
+
+    def _outline_accept(
+        self, main_topic: str, section_titles: List[str], batch: List[int], text: str
+    ) -> Dict[int, str]:
+        """Parse one batched reply; cache and return {section index: content}."""
+        parsed = parse_outline(text, [section_titles[i] for i in batch])
+        found = {}
+        for j, content in parsed.items():
+            i = batch[j]
+            found[i] = content
+            self._cache_store(self._section_cache_key(main_topic, section_titles[i]), content)
+        return found
+
+    def _generate_outline_batch(self, main_topic: str, section_titles: List[str], batch: List[int]) -> Dict[int, str]:
+        prompt = self._outline_prompt(main_topic, [section_titles[i] for i in batch])
+        with metrics.llm_span("generate_outline", self.model_name) as span:
+            try:
+                text = self._call_model(prompt)
+            except Exception as e:
+                print("⚠ Gemini generate_outline error:", repr(e))
+                span.outcome = "fallback"
+                return {}
+            span.tokens(prompt, text)
+            found = self._outline_accept(main_topic, section_titles, batch, text)
+            if not found:
+                span.outcome = "fallback"
+            return found
+
+    def _outline_finish(self, section_titles: List[str], results: List[Optional[str]]) -> List[int]:
+        missing = [i for i, text in enumerate(results) if text is None]
+        if missing:
+            print(
+                f"⚠ Outline reply missing or malformed for {len(missing)} of "
+                f"{len(section_titles)} sections; generating them one by one"
+            )
+        return missing
+
+    def generate_outline(
+        self,
+        main_topic: str,
+        section_titles: List[str],
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> List[str]:
+        """
+        Generate a whole outline with one JSON request per batch of up to
+        settings.llm_outline_batch_size sections, instead of one request per
+        section (the main_topic framing and the per-call latency are paid
+        once). Sections the reply leaves out or garbles fall back to
+        generate_section(), so the result is always complete and in order.
+        """
+        if not self.model:
+            return self._generate_each(main_topic, section_titles, max_concurrency, use_cache)
+
+        results, batches = self._outline_start(main_topic, section_titles, use_cache)
+        if len(batches) == 1:
+            parts = [self._generate_outline_batch(main_topic, section_titles, batches[0])]
+        elif batches:
+            workers = max(1, min(max_concurrency or settings.llm_max_concurrency, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-outline") as pool:
+                futures = [
+                    pool.submit(
+                        contextvars.copy_context().run,
+                        self._generate_outline_batch, main_topic, section_titles, batch,
+                    )
+                    for batch in batches
+                ]
+                parts = [f.result() for f in futures]
+        else:
+            parts = []
+        for found in parts:
+            for i, content in found.items():
+                results[i] = content
+
+        missing = self._outline_finish(section_titles, results)
+        if missing:
+            texts = self._generate_each(
+                main_topic, [section_titles[i] for i in missing], max_concurrency, use_cache
+            )
+            for i, text in zip(missing, texts):
+                results[i] = text
+        return results
+
+    async def _agenerate_outline_batch(
+        self, main_topic: str, section_titles: List[str], batch: List[int]
+    ) -> Dict[int, str]:
+        prompt = self._outline_prompt(main_topic, [section_titles[i] for i in batch])
+        with metrics.llm_span("generate_outline", self.model_name) as span:
+            try:
+                text = await self._acall_model(prompt)
+            except Exception as e:
+                print("⚠ Gemini agenerate_outline error:", repr(e))
+                span.outcome = "fallback"
+                return {}
+            span.tokens(prompt, text)
+            found = self._outline_accept(main_topic, section_titles, batch, text)
+            if not found:
+                span.outcome = "fallback"
+            return found
+
+    async def agenerate_outline(
+        self,
+        main_topic: str,
+        section_titles: List[str],
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> List[str]:
+        """Async generate_outline()."""
+        if not await self._amodel():
+            return await self._agenerate_each(main_topic, section_titles, max_concurrency, use_cache)
+
+        results, batches = self._outline_start(main_topic, section_titles, use_cache)
+        limit = asyncio.Semaphore(max(1, max_concurrency or settings.llm_max_concurrency))
+
+        async def one(batch: List[int]) -> Dict[int, str]:
+            async with limit:
+                return await self._agenerate_outline_batch(main_topic, section_titles, batch)
+
+        for found in await asyncio.gather(*(one(b) for b in batches)):
+            for i, content in found.items():
+                results[i] = content
+
+        missing = self._outline_finish(section_titles, results)
+        if missing:
+            texts = await self._agenerate_each(
+                main_topic, [section_titles[i] for i in missing], max_concurrency, use_cache
+            )
+            for i, text in zip(missing, texts):
+                results[i] = text
+        return results
 
     # ---------- Refinement ----------
 
-    def refine_text(
+    def _refine_prompt(
         self,
         original: str,
         refinement_prompt: str,
         section_title: str,
         main_topic: str,
     ) -> str:
-        """
-        Used when the user clicks "Refine" with an instruction.
-        """
-        prompt = (
+        return (
             "Refine the following document section.\n\n"
             f"Main topic: {main_topic}\n"
             f"Section title: {section_title}\n"
@@ -162,19 +839,447 @@ class LLMService:
             "Return only the improved version, no explanations."
         )
 
-        if not self.model:
+    def _refine_part_prompt(
+        self,
+        parts: List[str],
+        i: int,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+    ) -> str:
+        """Prompt for part i of a chunked refinement, with the neighbouring text as context."""
+        before = parts[i - 1].rsplit("\n\n", 1)[-1][-REFINE_CONTEXT_CHARS:] if i > 0 else ""
+        after = parts[i + 1].split("\n\n", 1)[0][:REFINE_CONTEXT_CHARS] if i + 1 < len(parts) else ""
+        context = ""
+        if before:
+            context += f"End of the previous part (context only, do not include it):\n{before}\n\n"
+        if after:
+            context += f"Start of the next part (context only, do not include it):\n{after}\n\n"
+        return (
+            "Refine one part of a longer document section. The parts are refined "
+            "separately and joined back together, so keep this part's scope and "
+            "stay consistent with the surrounding text.\n\n"
+            f"Main topic: {main_topic}\n"
+            f"Section title: {section_title}\n"
+            f"Refinement instruction: {refinement_prompt}\n"
+            f"Part: {i + 1} of {len(parts)}\n\n"
+            f"{context}"
+            "Text to refine:\n"
+            f"{parts[i]}\n\n"
+            "Return only the improved version of this part, no explanations."
+        )
+
+    def token_budget(self) -> int:
+        """Max estimated prompt tokens for one refine call to the current model."""
+        return settings.llm_token_budgets.get(self.model_name or "", settings.llm_default_token_budget)
+
+    def _refine_parts_for(
+        self,
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+    ) -> List[str]:
+        """
+        [original] if its refine prompt fits the model's token budget,
+        otherwise the text split at paragraph boundaries into parts whose
+        prompts (context included) fit.
+        """
+        budget = self.token_budget()
+        if estimate_tokens(self._refine_prompt(original, refinement_prompt, section_title, main_topic)) <= budget:
+            return [original]
+        overhead = (
+            estimate_tokens(self._refine_part_prompt(["", "", ""], 1, refinement_prompt, section_title, main_topic))
+            + 2 * (REFINE_CONTEXT_CHARS // 4)
+        )
+        return split_paragraphs(original, max(budget - overhead, MIN_REFINE_PART_TOKENS))
+
+    def _stitch(self, parts: List[str], results: List, span) -> Tuple[str, bool]:
+        """
+        Join refined parts back together in order. A part whose call failed
+        (or came back empty) keeps its original text; returns (text,
+        complete). Raises the first error if no part was refined.
+        """
+        failed = [i for i, r in enumerate(results) if isinstance(r, Exception) or not r]
+        errors = [r for r in results if isinstance(r, Exception)]
+        if len(failed) == len(parts):
+            raise errors[0] if errors else ValueError("empty refinement for every part")
+        if failed:
+            print(
+                f"⚠ Refinement kept the original text of {len(failed)} of {len(parts)} parts:",
+                repr(errors[0]) if errors else "empty response",
+            )
+            span.outcome = "partial"
+        return "\n\n".join(parts[i] if i in failed else results[i] for i in range(len(parts))), not failed
+
+    def _refine_in_parts(
+        self,
+        parts: List[str],
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+        span,
+    ) -> Tuple[str, bool]:
+        """Refine the parts in parallel on a thread pool; see _stitch()."""
+        prompts = [
+            self._refine_part_prompt(parts, i, refinement_prompt, section_title, main_topic)
+            for i in range(len(parts))
+        ]
+        workers = max(1, min(settings.llm_max_concurrency, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-refine") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._call_model, p) for p in prompts]
+            results = []
+            for f in futures:
+                try:
+                    results.append(f.result())
+                except Exception as e:
+                    results.append(e)
+        text, complete = self._stitch(parts, results, span)
+        span.tokens("".join(prompts), text)
+        return text, complete
+
+    async def _arefine_in_parts(
+        self,
+        parts: List[str],
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+        span,
+    ) -> Tuple[str, bool]:
+        """Async _refine_in_parts(): asyncio tasks bounded by a semaphore."""
+        prompts = [
+            self._refine_part_prompt(parts, i, refinement_prompt, section_title, main_topic)
+            for i in range(len(parts))
+        ]
+        limit = asyncio.Semaphore(max(1, settings.llm_max_concurrency))
+
+        async def one(prompt: str) -> str:
+            async with limit:
+                return await self._acall_model(prompt)
+
+        results = await asyncio.gather(*(one(p) for p in prompts), return_exceptions=True)
+        text, complete = self._stitch(parts, list(results), span)
+        span.tokens("".join(prompts), text)
+        return text, complete
+
+    def _refine_cache_key(
+        self,
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+    ) -> str:
+        return make_cache_key(
+            "refine",
+            self.model_name,
+            REFINE_PROMPT_VERSION,
+            original=normalize_text(original),
+            refinement_prompt=normalize_text(refinement_prompt, casefold=True),
+            section_title=normalize_text(section_title, casefold=True),
+            main_topic=normalize_text(main_topic, casefold=True),
+        )
+
+    def refine_text(
+        self,
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+        use_cache: bool = True,
+    ) -> str:
+        """
+        Used when the user clicks "Refine" with an instruction.
+        Live responses are cached; pass use_cache=False to force a fresh call.
+        """
+        model = self.model
+        with metrics.llm_span("refine", self.model_name) as span:
+            if not model:
+                span.outcome = "stub"
+                return self._fallback_refine(original, refinement_prompt)
+
+            key = self._refine_cache_key(original, refinement_prompt, section_title, main_topic)
+            cached = self._cache_lookup(key, use_cache)
+            if cached is not None:
+                span.outcome = "cache_hit"
+                return cached
+
+            parts = self._refine_parts_for(original, refinement_prompt, section_title, main_topic)
+            try:
+                if len(parts) > 1:
+                    # Too long for one prompt: refine paragraph groups in parallel
+                    text, complete = self._refine_in_parts(
+                        parts, refinement_prompt, section_title, main_topic, span
+                    )
+                    if complete:
+                        self._cache_store(key, text)
+                    return text
+
+                prompt = self._refine_prompt(original, refinement_prompt, section_title, main_topic)
+                text = self._call_model(prompt)
+                if text:
+                    span.tokens(prompt, text)
+                    self._cache_store(key, text)
+                    return text
+            except Exception as e:
+                print("⚠ Gemini refine_text error:", repr(e))
+
+            # Fallback if Gemini call fails
+            span.outcome = "fallback"
             return self._fallback_refine(original, refinement_prompt)
 
+    async def arefine_text(
+        self,
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+        use_cache: bool = True,
+    ) -> str:
+        """Async refine_text() for async_mode routes."""
+        model = await self._amodel()
+        with metrics.llm_span("refine", self.model_name) as span:
+            if not model:
+                span.outcome = "stub"
+                return self._fallback_refine(original, refinement_prompt)
+
+            key = self._refine_cache_key(original, refinement_prompt, section_title, main_topic)
+            cached = self._cache_lookup(key, use_cache)
+            if cached is not None:
+                span.outcome = "cache_hit"
+                return cached
+
+            parts = self._refine_parts_for(original, refinement_prompt, section_title, main_topic)
+            try:
+                if len(parts) > 1:
+                    text, complete = await self._arefine_in_parts(
+                        parts, refinement_prompt, section_title, main_topic, span
+                    )
+                    if complete:
+                        self._cache_store(key, text)
+                    return text
+
+                prompt = self._refine_prompt(original, refinement_prompt, section_title, main_topic)
+                text = await self._acall_model(prompt)
+                if text:
+                    span.tokens(prompt, text)
+                    self._cache_store(key, text)
+                    return text
+            except Exception as e:
+                print("⚠ Gemini arefine_text error:", repr(e))
+
+            span.outcome = "fallback"
+            return self._fallback_refine(original, refinement_prompt)
+
+    def speculative_refine(
+        self,
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+    ) -> Optional[str]:
+        """
+        Low-priority refine_text() for the preset prefetcher: None instead
+        of waiting or falling back. Runs only in live mode, with the circuit
+        closed, for sections that fit in one prompt, and while
+        settings.refine_prefetch_reserve of the rate-limit budget is free.
+        Results are not put in the response cache; the prefetcher keeps them.
+        """
+        model = self.model
+        if not model or self.breaker.state()["state"] != CircuitBreaker.CLOSED:
+            return None
+        prompt = self._refine_prompt(original, refinement_prompt, section_title, main_topic)
+        if estimate_tokens(prompt) > self.token_budget():
+            return None
+        if not self.limiter.has_headroom(settings.refine_prefetch_reserve):
+            return None
+
+        with metrics.llm_span("refine_prefetch", self.model_name) as span:
+            try:
+                text = self._call_model(prompt)
+            except Exception as e:
+                print("⚠ Gemini speculative_refine error:", repr(e))
+                span.outcome = "fallback"
+                return None
+            if not text:
+                span.outcome = "fallback"
+                return None
+            span.tokens(prompt, text)
+            return text
+
+    # ---------- Streaming refinement ----------
+
+    def _chunk_words(self, text: str, words_per_chunk: int = 3) -> Iterator[str]:
+        # Split on spaces but keep them (and newlines) so "".join() gives back the text
+        words = text.split(" ")
+        for i in range(0, len(words), words_per_chunk):
+            chunk = " ".join(words[i:i + words_per_chunk])
+            yield chunk if i + words_per_chunk >= len(words) else chunk + " "
+
+    def stream_refine(
+        self,
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+        use_cache: bool = True,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of refine_text(): yields text chunks as Gemini
+        produces them. Setting `cancel` (or closing the generator) stops
+        reading and cancels the upstream stream.
+
+        Stub mode and cache hits are replayed in small chunks so clients
+        see the same event shape either way. A failure before any text is
+        yielded degrades to the refine_text() fallback; a failure after
+        that raises StreamInterruptedError.
+        """
+        cancel = cancel or threading.Event()
+        model = self.model
+        with metrics.llm_span("refine_stream", self.model_name) as span:
+            yield from self._stream_refine(
+                model, span, original, refinement_prompt, section_title, main_topic, use_cache, cancel
+            )
+
+    def _stream_refine(
+        self,
+        model,
+        span,
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+        use_cache: bool,
+        cancel: threading.Event,
+    ) -> Iterator[str]:
+        if not model:
+            span.outcome = "stub"
+            for chunk in self._chunk_words(self._fallback_refine(original, refinement_prompt)):
+                if cancel.is_set():
+                    return
+                time.sleep(settings.llm_stub_stream_delay)
+                yield chunk
+            return
+
+        key = self._refine_cache_key(original, refinement_prompt, section_title, main_topic)
+        cached = self._cache_lookup(key, use_cache)
+        if cached is not None:
+            span.outcome = "cache_hit"
+            yield from self._chunk_words(cached)
+            return
+
+        pieces = self._refine_parts_for(original, refinement_prompt, section_title, main_topic)
+        if len(pieces) > 1:
+            yield from self._stream_refine_in_parts(
+                span, key, pieces, original, refinement_prompt, section_title, main_topic, cancel
+            )
+            return
+
+        prompt = self._refine_prompt(original, refinement_prompt, section_title, main_topic)
+        parts: List[str] = []
+        response = None
+        finished = False
+        try:
+            self._admit(estimate_tokens(prompt))
+            response = model.generate_content(prompt, stream=True)
+            for chunk in response:
+                if cancel.is_set():
+                    span.outcome = "cancelled"
+                    return
+                text = chunk.text or ""
+                if text:
+                    parts.append(text)
+                    yield text
+            finished = True
+            self._record_success()
+        except Exception as e:
+            if not isinstance(e, (CircuitOpenError, RateLimitedError)):
+                self._record_failure(e)
+            print("⚠ Gemini stream_refine error:", repr(e))
+            span.outcome = "fallback"
+            if not parts:
+                # Nothing sent yet: degrade like refine_text() does
+                yield self._fallback_refine(original, refinement_prompt)
+                return
+            # The caller already has a fragment; it must not be taken for the whole text
+            raise StreamInterruptedError("Gemini stream failed after partial output") from e
+        finally:
+            # Cancelled, closed by the caller (client went away) or failed
+            if response is not None and not finished:
+                self._cancel_stream(response)
+                self.breaker.release()
+
+        text = "".join(parts).strip()
+        span.tokens(prompt, text)
+        if text:
+            self._cache_store(key, text)
+
+    def _stream_refine_in_parts(
+        self,
+        span,
+        key: str,
+        pieces: List[str],
+        original: str,
+        refinement_prompt: str,
+        section_title: str,
+        main_topic: str,
+        cancel: threading.Event,
+    ) -> Iterator[str]:
+        """
+        Chunked refinement for stream_refine(): the parts are refined in
+        parallel and each is yielded, in order, as soon as it and the parts
+        before it are done.
+        """
+        prompts = [
+            self._refine_part_prompt(pieces, i, refinement_prompt, section_title, main_topic)
+            for i in range(len(pieces))
+        ]
+        workers = max(1, min(settings.llm_max_concurrency, len(prompts)))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-refine")
         try:
-            res = self.model.generate_content(prompt)
-            text = (res.text or "").strip()
-            if text:
-                return text
+            futures = [pool.submit(contextvars.copy_context().run, self._call_model, p) for p in prompts]
+            results = []
+            for i, future in enumerate(futures):
+                while True:
+                    if cancel.is_set():
+                        span.outcome = "cancelled"
+                        return
+                    try:
+                        results.append(future.result(timeout=0.1))
+                    except FutureTimeout:
+                        continue
+                    except Exception as e:
+                        results.append(e)
+                    break
+                # A failed part is sent as it was, like _stitch() keeps it
+                refined = results[i]
+                text = pieces[i] if isinstance(refined, Exception) or not refined else refined
+                yield text if i == 0 else "\n\n" + text
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        try:
+            text, complete = self._stitch(pieces, results, span)
         except Exception as e:
-            print("⚠ Gemini refine_text error:", repr(e))
+            print("⚠ Gemini stream_refine error:", repr(e))
+            span.outcome = "fallback"
+            # The parts went out unchanged already; add the note refine_text() would
+            yield "\n\n" + self._fallback_refine_note(refinement_prompt)
+            return
+        span.tokens("".join(prompts), text)
+        if complete:
+            self._cache_store(key, text)
 
-        # Fallback if Gemini call fails
-        return self._fallback_refine(original, refinement_prompt)
+    def _cancel_stream(self, response):
+        # google.generativeai keeps the underlying gRPC call on a private
+        # attribute; cancel it if we can so Gemini stops generating.
+        upstream = getattr(response, "_iterator", None)
+        cancel = getattr(upstream, "cancel", None)
+        if callable(cancel):
+            try:
+                cancel()
+            except Exception:
+                pass
 
 
 # Singleton instance used in routers
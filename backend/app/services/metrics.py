@@ -0,0 +1,308 @@
+# backend/app/services/metrics.py
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Seconds; covers fast queries up to slow LLM calls and renders
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ---------- Metric types (Prometheus text format) ----------
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, row in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                    cumulative += n
+                    le = f'le="{_number(float(bound))}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(row[-1])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+# A collector returns (name, type, help, [(labels dict, value), ...]) rows,
+# read when /metrics is scraped (e.g. cache sizes kept by other services).
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+# ---------- Per-request trace ----------
+
+class RequestTrace:
+    """Time and call count per stage (db, commit, llm, export, serialize) of one request."""
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()  # sections are generated on several threads
+
+    def add(self, stage: str, seconds: float, count: int = 1):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += count
+
+    def seconds(self, stage: str) -> float:
+        return self.stages.get(stage, (0.0, 0))[0]
+
+    def count(self, stage: str) -> int:
+        return self.stages.get(stage, (0.0, 0))[1]
+
+
+_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _trace.get()
+
+
+class LLMSpan:
+    """One LLMService operation; the caller fills in outcome and token counts."""
+
+    def __init__(self, operation: str, model: Optional[str]):
+        self.operation = operation
+        self.model = model or "none"
+        self.outcome = "live"  # live | cache_hit | stub | fallback | partial | cancelled
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def tokens(self, prompt: str, output: str):
+        # Same ~4 chars/token estimate the rate limiter budgets with
+        self.prompt_tokens = len(prompt) // 4 + 1
+        self.output_tokens = len(output) // 4 + 1 if output else 0
+
+
+class Metrics:
+    """
+    In-process metrics, rendered in the Prometheus text format on /metrics.
+
+    MetricsMiddleware opens a RequestTrace per request (a contextvar, so it
+    follows the request into threadpool threads); the SQLAlchemy hooks,
+    llm_span() and stage() add to it as work happens. When the request ends
+    its totals feed the per-route histograms, and requests slower than
+    `slow_request_ms` are logged with the breakdown.
+    """
+
+    def __init__(self):
+        self.slow_request_ms = 0.0
+        self._collectors: List[Collector] = []
+        self._metrics = []
+
+        self.http_requests = self._add(Counter(
+            "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")))
+        self.http_duration = self._add(Histogram(
+            "http_request_duration_seconds", "HTTP request latency.", ("method", "route")))
+        self.http_stage = self._add(Histogram(
+            "http_request_stage_seconds", "Time per request spent in each stage.", ("route", "stage")))
+        self.http_queries = self._add(Histogram(
+            "http_request_db_queries", "SQL statements executed per request.", ("route",),
+            buckets=QUERY_COUNT_BUCKETS))
+        self.db_queries = self._add(Counter("db_queries_total", "SQL statements executed."))
+        self.db_duration = self._add(Histogram("db_query_duration_seconds", "SQL statement latency."))
+        self.llm_calls = self._add(Counter(
+            "llm_requests_total", "LLMService operations by outcome.", ("operation", "model", "outcome")))
+        self.llm_duration = self._add(Histogram(
+            "llm_request_duration_seconds", "LLMService operation latency.", ("operation", "outcome")))
+        self.llm_tokens = self._add(Counter(
+            "llm_tokens_total", "Estimated LLM tokens sent and received.", ("model", "kind")))
+        self.export_render = self._add(Histogram(
+            "export_render_seconds", "Document render time in the export workers.", ("format",)))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    # ---------- Hooks ----------
+
+    def install(self, slow_request_ms: float = 0.0):
+        self.slow_request_ms = slow_request_ms
+        # Class-level listeners: every engine (read, write, async) and session
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(Session, "before_commit", self._before_commit)
+        event.listen(Session, "after_commit", self._after_commit)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        self.db_queries.inc()
+        self.db_duration.observe(elapsed)
+        trace = _trace.get()
+        if trace is not None:
+            trace.add("db", elapsed)
+
+    def _before_commit(self, session: Session):
+        trace = _trace.get()
+        if trace is not None:
+            session.info["metrics_commit"] = (time.perf_counter(), trace.seconds("db"))
+
+    def _after_commit(self, session: Session):
+        started = session.info.pop("metrics_commit", None)
+        trace = _trace.get()
+        if started is None or trace is None:
+            return
+        # Flush + COMMIT, minus the statements the flush ran (already in "db")
+        start, db_before = started
+        elapsed = time.perf_counter() - start - (trace.seconds("db") - db_before)
+        trace.add("commit", max(0.0, elapsed))
+
+    # ---------- Spans ----------
+
+    @contextmanager
+    def llm_span(self, operation: str, model: Optional[str]):
+        span = LLMSpan(operation, model)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            elapsed = time.perf_counter() - start
+            self.llm_calls.inc(operation=operation, model=span.model, outcome=span.outcome)
+            self.llm_duration.observe(elapsed, operation=operation, outcome=span.outcome)
+            if span.prompt_tokens:
+                self.llm_tokens.inc(span.prompt_tokens, model=span.model, kind="prompt")
+                self.llm_tokens.inc(span.output_tokens, model=span.model, kind="output")
+            trace = _trace.get()
+            if trace is not None:
+                trace.add("llm", elapsed)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of work as `name` in the current request's breakdown."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            trace = _trace.get()
+            if trace is not None:
+                trace.add(name, time.perf_counter() - start)
+
+    def observe_export(self, fmt: str, seconds: float):
+        self.export_render.observe(seconds, format=fmt)
+
+    # ---------- Requests ----------
+
+    def start_request(self) -> contextvars.Token:
+        return _trace.set(RequestTrace())
+
+    def finish_request(self, token: contextvars.Token, method: str, route: str, status: int, elapsed: float):
+        trace = _trace.get()
+        _trace.reset(token)
+        self.http_requests.inc(method=method, route=route, status=str(status))
+        self.http_duration.observe(elapsed, method=method, route=route)
+        if trace is None:
+            return
+        for stage, (seconds, _count) in trace.stages.items():
+            self.http_stage.observe(seconds, route=route, stage=stage)
+        self.http_queries.observe(trace.count("db"), route=route)
+
+        if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+            print(f"⚠ Slow request: {method} {route} {status} in {elapsed * 1000:.1f}ms - {self._breakdown(trace, elapsed)}")
+
+    @staticmethod
+    def _breakdown(trace: RequestTrace, elapsed: float) -> str:
+        parts = []
+        accounted = 0.0
+        for stage, (seconds, count) in sorted(trace.stages.items(), key=lambda kv: -kv[1][0]):
+            parts.append(f"{stage} {seconds * 1000:.1f}ms ({count})")
+            accounted += seconds
+        # LLM calls for several sections overlap, so stages can add up to more than the total
+        parts.append(f"other {max(0.0, elapsed - accounted) * 1000:.1f}ms")
+        return ", ".join(parts)
+
+    # ---------- Exposition ----------
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                rows = list(collector())
+            except Exception as e:
+                print("⚠ Metrics collector failed:", repr(e))
+                continue
+            for name, kind, help, samples in rows:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance; app.main installs the hooks and the middleware
+metrics = Metrics()
@@ -0,0 +1,246 @@
+# backend/app/services/prefetch.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.services.llm_cache import normalize_text
+from app.services.llm_service import llm_service
+
+
+def content_hash(content: str, section_title: str, main_topic: str) -> str:
+    """What a refinement of a section depends on, besides the instruction."""
+    raw = "\x1f".join((content or "", section_title or "", main_topic or ""))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RefinePrefetcher:
+    """
+    Speculative preset refinements (opt-in: settings.refine_prefetch_enabled).
+
+    Reading a section (a 200 from GET /sections/{id} or GET /projects/{id};
+    ETag polls answered with 304 don't count) or committing a change to its
+    content queues it. Background workers then refine it
+    with each of `presets` and keep the results under the hash of the
+    content, title and main topic they were made from. A refine request
+    whose prompt matches a preset takes the stored text instead of waiting
+    for Gemini, as long as the section still hashes the same (so a result
+    made in another process, or before an edit, is never served).
+
+    Speculative work is capped:
+    - at most `max_pending` sections wait in the queue; more are dropped
+    - `workers` threads do the work
+    - each call needs `reserve` of the rate limiter's budget to be free
+      (see LLMService.speculative_refine), so user clicks come first
+    - results are kept for at most `max_sections` sections (LRU)
+    A content change drops the section's results right away.
+    """
+
+    def __init__(self, enabled: bool, presets: List[str], workers: int, max_pending: int, max_sections: int):
+        self.enabled = enabled
+        self.presets: Dict[str, str] = {normalize_text(p, casefold=True): p for p in presets}
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.max_sections = max(1, max_sections)
+
+        self._queue: "OrderedDict[int, None]" = OrderedDict()
+        # section id -> (content hash, {normalized preset: refined text})
+        self._results: "OrderedDict[int, Tuple[str, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+
+        self.scheduled = 0
+        self.dropped = 0
+        self.generated = 0
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    # ---------- Lifecycle ----------
+
+    def install(self):
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def start(self):
+        if not self.enabled or self._threads:
+            return
+        self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"refine-prefetch-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        threads, self._threads = self._threads, []
+        with self._lock:
+            self._stopping = True
+            self._queue.clear()
+            self._wake.notify_all()
+        for thread in threads:
+            thread.join(timeout)
+
+    # ---------- Content changes ----------
+
+    def _after_flush(self, session: Session, _flush_context):
+        for obj in session.dirty:
+            if isinstance(obj, models.Section) and inspect(obj).attrs.content.history.has_changes():
+                session.info.setdefault("prefetch_sections", set()).add(obj.id)
+
+    def _after_commit(self, session: Session):
+        section_ids = session.info.pop("prefetch_sections", None)
+        if section_ids:
+            for section_id in section_ids:
+                self.invalidate(section_id)
+            self.schedule(section_ids)
+
+    def _after_rollback(self, session: Session):
+        session.info.pop("prefetch_sections", None)
+
+    def invalidate(self, section_id: int):
+        with self._lock:
+            if self._results.pop(section_id, None) is not None:
+                self.invalidated += 1
+
+    # ---------- Queue ----------
+
+    def schedule(self, section_ids: Iterable[int]):
+        """Queue sections for speculative refinement (no-op when disabled)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._stopping:
+                return
+            for section_id in section_ids:
+                if section_id in self._queue:
+                    continue
+                if len(self._queue) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._queue[section_id] = None
+                self.scheduled += 1
+            self._wake.notify_all()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._stopping:
+                    self._wake.wait()
+                if self._stopping:
+                    return
+                section_id, _ = self._queue.popitem(last=False)
+            try:
+                self._prefetch(section_id)
+            except Exception as e:
+                print(f"⚠ Refinement prefetch failed for section {section_id}:", repr(e))
+
+    def _load(self, section_id: int) -> Optional[Tuple[str, str, str]]:
+        db = SessionLocal()
+        try:
+            row = db.execute(
+                select(models.Section.content, models.Section.title, models.Project.main_topic)
+                .join(models.Project)
+                .where(models.Section.id == section_id)
+            ).first()
+        finally:
+            db.close()
+        return tuple(row) if row else None
+
+    def _prefetch(self, section_id: int):
+        loaded = self._load(section_id)
+        if not loaded or not (loaded[0] or "").strip():
+            return
+        content, section_title, main_topic = loaded
+        digest = content_hash(content, section_title, main_topic)
+
+        for key, preset in self.presets.items():
+            with self._lock:
+                if self._stopping or section_id in self._queue:
+                    # Shutting down, or queued again (maybe with new content): that run finishes it
+                    return
+                entry = self._results.get(section_id)
+                if entry and entry[0] == digest and key in entry[1]:
+                    continue
+
+            text = llm_service.speculative_refine(content, preset, section_title, main_topic)
+            if text is None:
+                # No spare budget (or Gemini trouble): leave the rest for the next read
+                with self._lock:
+                    self.skipped += 1
+                return
+            self._store(section_id, digest, key, text)
+
+    def _store(self, section_id: int, digest: str, key: str, text: str):
+        with self._lock:
+            entry = self._results.get(section_id)
+            if entry is None or entry[0] != digest:
+                entry = self._results[section_id] = (digest, {})
+            entry[1][key] = text
+            self._results.move_to_end(section_id)
+            while len(self._results) > self.max_sections:
+                self._results.popitem(last=False)
+            self.generated += 1
+
+    # ---------- Lookup ----------
+
+    def take(
+        self,
+        section_id: int,
+        content: str,
+        section_title: str,
+        main_topic: str,
+        refinement_prompt: str,
+    ) -> Optional[str]:
+        """The prefetched refinement for this exact content and preset, if there is one."""
+        if not self.enabled:
+            return None
+        key = normalize_text(refinement_prompt, casefold=True)
+        if key not in self.presets:
+            return None
+        digest = content_hash(content, section_title, main_topic)
+        with self._lock:
+            entry = self._results.get(section_id)
+            text = entry[1].get(key) if entry and entry[0] == digest else None
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(section_id)
+            return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "presets": list(self.presets.values()),
+                "pending": len(self._queue),
+                "sections": len(self._results),
+                "scheduled": self.scheduled,
+                "dropped": self.dropped,
+                "generated": self.generated,
+                "skipped": self.skipped,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidated": self.invalidated,
+            }
+
+
+# Singleton instance; app.main installs the hooks and starts/stops the workers
+refine_prefetcher = RefinePrefetcher(
+    enabled=settings.refine_prefetch_enabled,
+    presets=settings.refine_presets,
+    workers=settings.refine_prefetch_workers,
+    max_pending=settings.refine_prefetch_max_pending,
+    max_sections=settings.refine_prefetch_max_sections,
+)
@@ -0,0 +1,302 @@
+# backend/app/services/rate_limit.py
+
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+
+class RateLimitedError(Exception):
+    """Raised when the rate limiter can't grant capacity within the wait budget."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the circuit breaker is open."""
+
+
+# ---------- Token bucket ----------
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills at
+    rate_per_minute * scale. rate_per_minute <= 0 disables the bucket.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.scale = 1.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_minute > 0
+
+    def _refill(self, now: float):
+        rate_per_second = self.rate_per_minute * self.scale / 60.0
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate_per_second)
+        self._updated = now
+
+    def try_acquire(self, amount: float) -> float:
+        """
+        Take `amount` tokens if available and return 0.0, otherwise return
+        how many seconds to wait before they will be.
+        """
+        if not self.enabled:
+            return 0.0
+        # A single request larger than the bucket can never fit; let it through
+        # once the bucket is full rather than blocking forever.
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            rate_per_second = self.rate_per_minute * self.scale / 60.0
+            return (amount - self._tokens) / rate_per_second
+
+    def free_fraction(self) -> float:
+        """Share of the bucket available right now (1.0 when disabled)."""
+        if not self.enabled:
+            return 1.0
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens / self.capacity if self.capacity > 0 else 1.0
+
+    def refund(self, amount: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def state(self) -> dict:
+        with self._lock:
+            if self.enabled:
+                self._refill(time.monotonic())
+            return {
+                "enabled": self.enabled,
+                "rate_per_minute": self.rate_per_minute,
+                "effective_rate_per_minute": self.rate_per_minute * self.scale,
+                "capacity": self.capacity,
+                "available": round(self._tokens, 2),
+            }
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets in front of Gemini.
+
+    Adaptive (AIMD): a quota error halves the effective refill rate, and
+    every success adds a bit back, so we settle just under the real quota
+    instead of hammering it.
+    """
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        min_scale: float = 0.1,
+        recovery_step: float = 0.05,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.min_scale = min_scale
+        self.recovery_step = recovery_step
+        self._lock = threading.Lock()
+
+        self.granted = 0
+        self.waited_seconds = 0.0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _try_acquire(self, token_estimate: int) -> float:
+        """0.0 if both budgets granted the call, else seconds to wait."""
+        wait = self.requests.try_acquire(1)
+        if wait == 0.0:
+            wait = self.tokens.try_acquire(token_estimate)
+            if wait == 0.0:
+                with self._lock:
+                    self.granted += 1
+                return 0.0
+            self.requests.refund(1)
+        return wait
+
+    def _give_up(self, wait: float, deadline: float) -> bool:
+        if time.monotonic() + wait > deadline:
+            with self._lock:
+                self.rejected += 1
+            return True
+        with self._lock:
+            self.waited_seconds += wait
+        return False
+
+    def acquire(self, token_estimate: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._try_acquire(token_estimate)
+            if wait == 0.0:
+                return True
+            if self._give_up(wait, deadline):
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, token_estimate: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._try_acquire(token_estimate)
+            if wait == 0.0:
+                return True
+            if self._give_up(wait, deadline):
+                return False
+            await asyncio.sleep(wait)
+
+    def has_headroom(self, fraction: float) -> bool:
+        """True if at least `fraction` of both budgets is free (for low-priority work)."""
+        return self.requests.free_fraction() >= fraction and self.tokens.free_fraction() >= fraction
+
+    def _set_scale(self, scale: float):
+        scale = max(self.min_scale, min(1.0, scale))
+        for bucket in (self.requests, self.tokens):
+            with bucket._lock:
+                bucket._refill(time.monotonic())
+                bucket.scale = scale
+
+    def on_throttled(self):
+        with self._lock:
+            self.throttled += 1
+        self._set_scale(self.requests.scale / 2)
+
+    def on_success(self):
+        if self.requests.scale < 1.0:
+            self._set_scale(self.requests.scale + self.recovery_step)
+
+    def state(self) -> dict:
+        with self._lock:
+            counters = {
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+        return {
+            "scale": round(self.requests.scale, 3),
+            "requests": self.requests.state(),
+            "tokens": self.tokens.state(),
+            **counters,
+        }
+
+
+# ---------- Circuit breaker ----------
+
+class CircuitBreaker:
+    """
+    closed    -> calls flow; `failure_threshold` consecutive failures open it.
+    open      -> calls are refused until `reset_timeout` seconds have passed.
+    half_open -> up to `half_open_max_calls` probe calls are let through;
+                 a success closes the breaker, a failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+        self.opened_count = 0
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.short_circuited += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._probes = 0
+
+            if self._state == self.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.short_circuited += 1
+                    return False
+                self._probes += 1
+
+            return True
+
+    def release(self):
+        """Give back a half-open probe slot that was granted but never used."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened_count += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def state(self) -> dict:
+        with self._lock:
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_in_seconds": round(retry_in, 2),
+                "opened_count": self.opened_count,
+                "short_circuited": self.short_circuited,
+            }
+
+
+# ---------- Retry helpers ----------
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_quota_error(e: Exception) -> bool:
+    code = getattr(e, "code", None)
+    return code == 429 or type(e).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """
+    Quota, 5xx, timeouts and connection problems are worth retrying;
+    bad requests (4xx other than 429) are not.
+    """
+    if is_quota_error(e):
+        return True
+    code = getattr(e, "code", None)
+    if isinstance(code, int) and 500 <= code < 600:
+        return True
+    return isinstance(e, (TimeoutError, ConnectionError)) or type(e).__name__ in (
+        "ServiceUnavailable",
+        "InternalServerError",
+        "DeadlineExceeded",
+        "GatewayTimeout",
+    )
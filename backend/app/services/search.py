@@ -0,0 +1,266 @@
+# backend/app/services/search.py
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session
+
+from app import models
+
+TABLE = "search_index"
+
+# Each indexed row gets rowid = source id * 4 + kind code, so a row can be
+# replaced or removed without a lookup.
+KIND_CODES = {"project": 0, "section": 1, "comment": 2, "refinement": 3}
+
+_MODEL_KINDS = {
+    models.Project: "project",
+    models.Section: "section",
+    models.Comment: "comment",
+    models.Refinement: "refinement",
+}
+
+# (rowid, title, body, owner, kind, project_id, section_id) per source row.
+# `owner` is an indexed "u<id>" token: owner scoping is then part of the
+# FTS match itself instead of a filter over every hit.
+_SOURCES = {
+    "project": """
+        SELECT p.id * 4 + 0, p.name, p.main_topic, 'u' || p.owner_id, 'project', p.id, NULL
+        FROM projects p {where}
+    """,
+    "section": """
+        SELECT s.id * 4 + 1, s.title, coalesce(s.content, ''), 'u' || p.owner_id, 'section', p.id, s.id
+        FROM sections s JOIN projects p ON p.id = s.project_id {where}
+    """,
+    "comment": """
+        SELECT c.id * 4 + 2, '', c.text, 'u' || p.owner_id, 'comment', p.id, s.id
+        FROM comments c
+        JOIN sections s ON s.id = c.section_id
+        JOIN projects p ON p.id = s.project_id {where}
+    """,
+    "refinement": """
+        SELECT r.id * 4 + 3, '', r.prompt, 'u' || p.owner_id, 'refinement', p.id, s.id
+        FROM refinements r
+        JOIN sections s ON s.id = r.section_id
+        JOIN projects p ON p.id = s.project_id {where}
+    """,
+}
+_SOURCE_ALIASES = {"project": "p", "section": "s", "comment": "c", "refinement": "r"}
+_LIKE_COLUMNS = {
+    "project": ("p.name", "p.main_topic"),
+    "section": ("s.title", "coalesce(s.content, '')"),
+    "comment": ("''", "c.text"),
+    "refinement": ("''", "r.prompt"),
+}
+
+_INSERT = f"INSERT INTO {TABLE} (rowid, title, body, owner, kind, project_id, section_id) "
+
+_TERM_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+# bm25 scans a term's whole posting list to weigh it, so words found in
+# nearly every row cost the most while barely changing the ranking.
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+
+
+def create_table(conn):
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        "title, body, owner, "
+        "kind UNINDEXED, project_id UNINDEXED, section_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    ))
+
+
+def fts5_available(conn) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    return bool(conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+
+
+def rebuild(conn):
+    """(Re)index every project, section, comment and refinement."""
+    conn.execute(text(f"DELETE FROM {TABLE}"))
+    for sql in _SOURCES.values():
+        conn.execute(text(_INSERT + sql.format(where="")))
+
+
+def fts_query(q: str, owner_id: int) -> Optional[str]:
+    """
+    User input -> FTS5 query: every word (stopwords aside) must match in
+    the title or body; a trailing * makes it a prefix search. Quoting each
+    term keeps FTS5 operators in the input from being interpreted.
+    """
+    terms = []
+    for term in _TERM_RE.findall(q):
+        prefix = term.endswith("*")
+        word = term.rstrip("*")
+        if word:
+            terms.append((word, f'"{word}"' + ("*" if prefix else "")))
+    if not terms:
+        return None
+    # Leave out stopwords, unless that would leave nothing to search for
+    terms = [t for w, t in terms if w.lower() not in STOPWORDS] or [t for _, t in terms]
+    return f"owner:u{owner_id} AND {{title body}}:({' '.join(terms)})"
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over project topics, section titles/content, comments
+    and refinement prompts.
+
+    Kept up to date from a Session after_flush hook, inside the same
+    transaction as the write, so every code path that saves those models
+    (routes, the job worker, the streaming refine) is covered. On databases
+    without FTS5 the hook does nothing and search() falls back to LIKE.
+    """
+
+    def __init__(self):
+        self._enabled: Dict[object, bool] = {}
+
+    def install(self):
+        event.listen(Session, "after_flush", self._after_flush)
+
+    def enabled(self, conn) -> bool:
+        engine = conn.engine
+        if engine not in self._enabled:
+            self._enabled[engine] = fts5_available(conn) and bool(conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": TABLE},
+            ).first())
+        return self._enabled[engine]
+
+    # ---------- Incremental updates ----------
+
+    def _after_flush(self, session: Session, _flush_context):
+        changed: Dict[str, Set[int]] = defaultdict(set)
+        removed: List[int] = []
+
+        for obj in session.new | session.dirty:
+            kind = _MODEL_KINDS.get(type(obj))
+            if kind and obj.id is not None:
+                changed[kind].add(obj.id)
+        for obj in session.deleted:
+            kind = _MODEL_KINDS.get(type(obj))
+            if kind and obj.id is not None:
+                removed.append(obj.id * 4 + KIND_CODES[kind])
+
+        if not changed and not removed:
+            return
+        conn = session.connection()
+        if not self.enabled(conn):
+            return
+
+        for kind, ids in changed.items():
+            removed.extend(i * 4 + KIND_CODES[kind] for i in ids)
+        conn.execute(
+            text(f"DELETE FROM {TABLE} WHERE rowid IN :rowids").bindparams(
+                bindparam("rowids", expanding=True)
+            ),
+            {"rowids": removed},
+        )
+        for kind, ids in changed.items():
+            where = f"WHERE {_SOURCE_ALIASES[kind]}.id IN :ids"
+            conn.execute(
+                text(_INSERT + _SOURCES[kind].format(where=where)).bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": sorted(ids)},
+            )
+
+    # ---------- Queries ----------
+
+    def search(
+        self,
+        db: Session,
+        owner_id: int,
+        q: str,
+        kind: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[int, List[Dict]]:
+        """(total, hits) for the owner's content, best match first."""
+        conn = db.connection()
+        if not self.enabled(conn):
+            return self._search_like(db, owner_id, q, kind, offset, limit)
+
+        match = fts_query(q, owner_id)
+        if match is None:
+            return 0, []
+
+        kind_filter = "AND kind = :kind" if kind else ""
+        params = {"match": match, "kind": kind, "offset": offset, "limit": limit}
+        total = conn.execute(
+            text(f"SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH :match {kind_filter}"),
+            params,
+        ).scalar()
+        rows = conn.execute(
+            text(
+                f"SELECT rowid, kind, project_id, section_id, title, "
+                f"snippet({TABLE}, 1, '[', ']', '…', 12) AS snippet, "
+                # Title hits count more than body hits; the owner token not at all
+                f"bm25({TABLE}, 4.0, 1.0, 0.0) AS score "
+                f"FROM {TABLE} WHERE {TABLE} MATCH :match {kind_filter} "
+                "ORDER BY score LIMIT :limit OFFSET :offset"
+            ),
+            params,
+        ).mappings().all()
+
+        return total, [
+            {
+                "kind": r["kind"],
+                "id": r["rowid"] // 4,
+                "project_id": r["project_id"],
+                "section_id": r["section_id"],
+                "title": r["title"],
+                "snippet": r["snippet"],
+                "score": round(-r["score"], 4),  # bm25: lower is better
+            }
+            for r in rows
+        ]
+
+    def _search_like(self, db, owner_id, q, kind, offset, limit) -> Tuple[int, List[Dict]]:
+        """Unranked fallback for databases without FTS5 (e.g. Postgres): every word via LIKE."""
+        words = [t.rstrip("*").lower() for t in _TERM_RE.findall(q) if t.rstrip("*")]
+        if not words:
+            return 0, []
+
+        params = {"owner_id": owner_id, **{f"w{i}": f"%{w}%" for i, w in enumerate(words)}}
+        parts = []
+        for name, sql in _SOURCES.items():
+            if kind and kind != name:
+                continue
+            title_col, body_col = _LIKE_COLUMNS[name]
+            conds = " AND ".join(
+                f"(lower({title_col}) LIKE :w{i} OR lower({body_col}) LIKE :w{i})"
+                for i in range(len(words))
+            )
+            parts.append(sql.format(where=f"WHERE p.owner_id = :owner_id AND {conds}"))
+
+        union = " UNION ALL ".join(parts)
+        conn = db.connection()
+        total = conn.execute(text(f"SELECT count(*) FROM ({union}) AS hits"), params).scalar()
+        rows = conn.execute(
+            text(f"SELECT * FROM ({union}) AS hits ORDER BY 1 DESC LIMIT :limit OFFSET :offset"),
+            {**params, "limit": limit, "offset": offset},
+        ).all()
+        return total, [
+            {
+                "kind": r[4],
+                "id": r[0] // 4,
+                "project_id": r[5],
+                "section_id": r[6],
+                "title": r[1],
+                "snippet": (r[2] or "")[:160],
+                "score": 0.0,
+            }
+            for r in rows
+        ]
+
+
+# Singleton instance; app.main installs the flush hook
+search_index = SearchIndex()
@@ -0,0 +1,166 @@
+# backend/app/services/serializers.py
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy.orm import load_only, selectinload
+
+from app import models
+from app.services.metrics import metrics
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+# resource -> (model, scalar fields in output order, {relation: child resource}).
+# Mirrors schemas.ProjectOut / schemas.Section / schemas.Comment.
+RESOURCES = {
+    "project": (models.Project, ("id", "name", "document_type", "main_topic"), {"sections": "section"}),
+    "section": (
+        models.Section,
+        ("id", "order_index", "title", "content", "likes", "dislikes"),
+        {"comments": "comment"},
+    ),
+    "comment": (models.Comment, ("id", "text"), {}),
+}
+
+
+@dataclass
+class Selection:
+    """Which fields of a resource, and which related resources, go into a response."""
+    resource: str
+    fields: Tuple[str, ...]
+    children: Dict[str, "Selection"] = field(default_factory=dict)
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=400, detail=detail)
+
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _resolve(root: str, path: List[str]) -> str:
+    """Resource reached by following relation names from `root`."""
+    resource = root
+    for rel in path:
+        relations = RESOURCES[resource][2]
+        if rel not in relations:
+            raise _bad_request(f"Unknown relation '{rel}' on {resource}")
+        resource = relations[rel]
+    return resource
+
+
+def parse_selection(root: str, fields: Optional[str], include: Optional[str]) -> Selection:
+    """
+    Build a Selection from the `fields` / `include` query parameters.
+
+    include: comma-separated relation paths to embed, e.g. "sections" or
+             "sections.comments". Omitted = everything (the full document);
+             empty = no relations.
+    fields:  comma-separated field names, dotted for related resources,
+             e.g. "name,sections.title". A resource with no field listed
+             keeps all of its fields; "id" is always included.
+    """
+    paths = [()]
+    rel_paths = _split(include) if include is not None else None
+    if rel_paths is None:
+        # Default: every relation, recursively
+        stack = [(root, ())]
+        while stack:
+            resource, path = stack.pop()
+            for rel, child in RESOURCES[resource][2].items():
+                paths.append(path + (rel,))
+                stack.append((child, path + (rel,)))
+    else:
+        for rel_path in rel_paths:
+            parts = tuple(rel_path.split("."))
+            _resolve(root, list(parts))
+            # Embedding a.b implies embedding a
+            paths.extend(parts[:i] for i in range(1, len(parts) + 1))
+
+    wanted: Dict[Tuple[str, ...], List[str]] = {}
+    for name in _split(fields or ""):
+        *path, attr = name.split(".")
+        path = tuple(path)
+        resource = _resolve(root, list(path))
+        if attr not in RESOURCES[resource][1]:
+            raise _bad_request(f"Unknown field '{attr}' on {resource}")
+        if path not in paths:
+            paths.append(path)  # asking for sections.title implies include=sections
+        wanted.setdefault(path, []).append(attr)
+
+    def build(resource: str, path: Tuple[str, ...]) -> Selection:
+        all_fields = RESOURCES[resource][1]
+        chosen = wanted.get(path)
+        fields_ = all_fields if not chosen else tuple(f for f in all_fields if f == "id" or f in chosen)
+        sel = Selection(resource, fields_)
+        for rel, child in RESOURCES[resource][2].items():
+            if path + (rel,) in paths:
+                sel.children[rel] = build(child, path + (rel,))
+        return sel
+
+    return build(root, ())
+
+
+def loader_options(sel: Selection) -> list:
+    """
+    ORM options that load exactly what `sel` will output: only the selected
+    columns, and the selected relations batch-loaded with selectinload.
+    """
+    model = RESOURCES[sel.resource][0]
+    options = [load_only(*(getattr(model, f) for f in sel.fields))]
+    options.extend(_relation_options(model, sel))
+    return options
+
+
+def _relation_options(model, sel: Selection) -> list:
+    options = []
+    for rel, child_sel in sel.children.items():
+        prop = getattr(model, rel)
+        child_model = RESOURCES[child_sel.resource][0]
+        # The foreign key (and the relationship's order_by columns) must be
+        # loaded too, or selectinload can't group and sort the children.
+        columns = {getattr(child_model, f) for f in child_sel.fields}
+        columns.update(getattr(child_model, c.key) for c in prop.property.remote_side)
+        columns.update(getattr(child_model, c.key) for c in prop.property.order_by or ())
+        loader = selectinload(prop).load_only(*columns)
+        for sub in _relation_options(child_model, child_sel):
+            loader = loader.options(sub)
+        options.append(loader)
+    return options
+
+
+def _dump(obj: Any, sel: Selection) -> Dict:
+    data = {f: getattr(obj, f) for f in sel.fields}
+    for rel, child_sel in sel.children.items():
+        data[rel] = [_dump(child, child_sel) for child in getattr(obj, rel)]
+    return data
+
+
+def dump(obj: Any, sel: Selection) -> Dict:
+    """Plain dict of the selected fields; no Pydantic validation on the way."""
+    with metrics.stage("serialize"):
+        return _dump(obj, sel)
+
+
+def dump_many(objs: Iterable[Any], sel: Selection) -> List[Dict]:
+    with metrics.stage("serialize"):
+        return [_dump(obj, sel) for obj in objs]
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    with metrics.stage("serialize"):
+        content = dumps(data)
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,99 @@
+# backend/app/services/singleflight.py
+
+import asyncio
+import inspect
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller (the
+    "leader") runs the function, everyone who arrives while it is still
+    running waits for and receives the same result (or exception).
+
+    Callers can be plain threads (do) or asyncio tasks (do_async); both
+    wait on the same concurrent.futures.Future, so a thread and a task
+    asking for the same key also share one call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()  # keeps leader tasks from being GC'd
+
+        self.executed = 0   # calls that actually ran
+        self.coalesced = 0  # calls that piggy-backed on an in-flight one
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut, False
+
+            fut = Future()
+            # Mark as running so a cancelled waiter can't cancel it for the others
+            fut.set_running_or_notify_cancel()
+            self._calls[key] = fut
+            self.executed += 1
+            return fut, True
+
+    def _run(self, key: str, fut: Future, fn: Callable[[], Any]):
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._calls.pop(key, None)
+            fut.set_exception(e)
+            return
+        with self._lock:
+            self._calls.pop(key, None)
+        fut.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        fut, leader = self._join(key)
+        if leader:
+            self._run(key, fut, fn)
+        return fut.result()
+
+    async def _arun(self, key: str, fut: Future, fn: Callable[[], Awaitable[Any]]):
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                self._calls.pop(key, None)
+            fut.set_exception(e)
+            return
+        with self._lock:
+            self._calls.pop(key, None)
+        fut.set_result(result)
+
+    async def do_async(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Like do(), but awaits instead of blocking. fn is either a coroutine
+        function, or a functools.partial of one (awaited on this loop), or a
+        blocking callable (run on the default executor). The leader's work runs as its own task/thread,
+        so cancelling the leader does not cancel the call for other waiters.
+        """
+        fut, leader = self._join(key)
+        if leader:
+            if inspect.iscoroutinefunction(fn):
+                task = asyncio.ensure_future(self._arun(key, fut, fn))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                loop = asyncio.get_running_loop()
+                loop.run_in_executor(None, self._run, key, fut, fn)
+        return await asyncio.wrap_future(fut)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": self.coalesced / total if total else 0.0,
+            }
@@ -0,0 +1,83 @@
+# backend/app/services/versioning.py
+
+from typing import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def bump_sections(conn, section_ids: Iterable[int]):
+    """
+    version = version + 1 on the given sections and on the projects that
+    contain them (a project's representation embeds its sections). Done
+    in SQL so concurrent writers never lose a bump.
+    """
+    ids = sorted(set(section_ids))
+    if not ids:
+        return
+    sections = models.Section.__table__
+    projects = models.Project.__table__
+    conn.execute(sections.update().where(sections.c.id.in_(ids)).values(version=sections.c.version + 1))
+    conn.execute(
+        projects.update()
+        .where(projects.c.id.in_(select(sections.c.project_id).where(sections.c.id.in_(ids))))
+        .values(version=projects.c.version + 1)
+    )
+
+
+def bump_projects(conn, project_ids: Iterable[int]):
+    ids = sorted(set(project_ids))
+    if not ids:
+        return
+    projects = models.Project.__table__
+    conn.execute(projects.update().where(projects.c.id.in_(ids)).values(version=projects.c.version + 1))
+
+
+class Versioning:
+    """
+    Keeps Project.version / Section.version moving whenever something a
+    GET would return changes, so routes can answer If-None-Match from a
+    single indexed lookup (see app.etags).
+
+    - Section content/title/order edits (refinements, generation jobs)
+      -> the section and its project
+    - Comments added or removed -> their section and its project
+    - Sections added or removed, project fields edited -> the project
+    - Votes are counted with plain SQL and bump in services/feedback.py
+    """
+
+    def install(self):
+        event.listen(Session, "after_flush", self._after_flush)
+
+    def _after_flush(self, session: Session, _flush_context):
+        section_ids, project_ids = set(), set()
+
+        for obj in session.new | session.deleted:
+            if isinstance(obj, models.Comment):
+                section_ids.add(obj.section_id)
+            elif isinstance(obj, models.Section):
+                project_ids.add(obj.project_id)
+
+        for obj in session.dirty:
+            # Only column changes count; appending to a relationship
+            # collection shows up as a new child above.
+            if not session.is_modified(obj, include_collections=False):
+                continue
+            if isinstance(obj, models.Section):
+                section_ids.add(obj.id)
+            elif isinstance(obj, models.Project):
+                project_ids.add(obj.id)
+
+        section_ids.discard(None)
+        project_ids.discard(None)
+        if not (section_ids or project_ids):
+            return
+        conn = session.connection()
+        bump_sections(conn, section_ids)
+        bump_projects(conn, project_ids)
+
+
+# Singleton instance; app.main installs the hook
+versioning = Versioning()
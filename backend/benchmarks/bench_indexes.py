@@ -0,0 +1,171 @@
+# backend/benchmarks/bench_indexes.py
+"""
+Hot-query latency vs. table size, with and without the composite indexes
+added by migration 0001_hot_query_indexes.
+
+Run from backend/:
+    python -m benchmarks.bench_indexes --sizes 1000,10000,100000 --json out.json
+
+For each size N (number of sections; comments/refinements/feedbacks are
+generated proportionally), a temporary SQLite database is filled and each
+hot query is timed. With the indexes the per-query time should stay
+roughly flat as N grows; without them it grows linearly.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import models
+from app.database import Base, make_engine
+from app.migrations import run_migrations
+
+SECTIONS_PER_PROJECT = 10
+PROJECTS_PER_USER = 20
+
+HOT_QUERIES = {
+    "projects_by_owner": (
+        "SELECT id, name FROM projects WHERE owner_id = :owner_id AND id > :cursor "
+        "ORDER BY id LIMIT 50"
+    ),
+    "sections_by_project": (
+        "SELECT id, title FROM sections WHERE project_id = :project_id ORDER BY order_index"
+    ),
+    "comments_by_section": (
+        "SELECT id, text FROM comments WHERE section_id = :section_id ORDER BY created_at"
+    ),
+    "refinements_by_section": (
+        "SELECT id, prompt FROM refinements WHERE section_id = :section_id ORDER BY created_at"
+    ),
+    "feedbacks_by_section": (
+        "SELECT count(*) FROM feedbacks WHERE section_id = :section_id"
+    ),
+}
+
+
+def _fill(engine, n_sections: int):
+    n_projects = max(1, n_sections // SECTIONS_PER_PROJECT)
+    n_users = max(1, n_projects // PROJECTS_PER_USER)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(
+            models.User.__table__.insert(),
+            [{"id": u, "email": f"user{u}@bench", "hashed_password": "x"} for u in range(1, n_users + 1)],
+        )
+        conn.execute(
+            models.Project.__table__.insert(),
+            [
+                {
+                    "id": p,
+                    "owner_id": (p % n_users) + 1,
+                    "name": f"Project {p}",
+                    "document_type": "docx",
+                    "main_topic": "Benchmarks",
+                    "created_at": now,
+                }
+                for p in range(1, n_projects + 1)
+            ],
+        )
+        conn.execute(
+            models.Section.__table__.insert(),
+            [
+                {
+                    "id": s,
+                    "project_id": ((s - 1) % n_projects) + 1,
+                    "order_index": (s - 1) // n_projects,
+                    "title": f"Section {s}",
+                    "content": "Lorem ipsum " * 20,
+                }
+                for s in range(1, n_sections + 1)
+            ],
+        )
+        for table, column in (
+            (models.Comment.__table__, {"text": "Looks good"}),
+            (models.Refinement.__table__, {"prompt": "Make concise"}),
+            (models.Feedback.__table__, {"is_like": True}),
+        ):
+            conn.execute(
+                table.insert(),
+                [
+                    {
+                        "section_id": random.randint(1, n_sections),
+                        "created_at": now - timedelta(seconds=i),
+                        **column,
+                    }
+                    for i in range(n_sections)
+                ],
+            )
+    return n_users, n_projects
+
+
+def _drop_hot_indexes(engine):
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if len(index.columns) > 1:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+
+def _time_queries(engine, n_users, n_projects, n_sections, repeats):
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in HOT_QUERIES.items():
+            samples = []
+            for _ in range(repeats):
+                params = {
+                    "owner_id": random.randint(1, n_users),
+                    "cursor": 0,
+                    "project_id": random.randint(1, n_projects),
+                    "section_id": random.randint(1, n_sections),
+                }
+                start = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                samples.append((time.perf_counter() - start) * 1000)
+            results[name] = round(statistics.median(samples), 4)
+    return results
+
+
+def run(sizes, repeats):
+    report = []
+    for n_sections in sizes:
+        for indexed in (True, False):
+            with tempfile.TemporaryDirectory() as tmp:
+                engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+                Base.metadata.create_all(bind=engine)
+                run_migrations(engine)
+                if not indexed:
+                    _drop_hot_indexes(engine)
+                n_users, n_projects = _fill(engine, n_sections)
+                timings = _time_queries(engine, n_users, n_projects, n_sections, repeats)
+                engine.dispose()
+
+            report.append({"sections": n_sections, "indexed": indexed, "median_ms": timings})
+            label = "indexed  " if indexed else "unindexed"
+            print(f"{n_sections:>8} sections  {label}  " + "  ".join(
+                f"{k}={v:.3f}ms" for k, v in timings.items()
+            ))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = run([int(s) for s in args.sizes.split(",")], args.repeats)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+# backend/benchmarks/bench_load.py
+"""
+End-to-end latency/throughput of the API under load, with a fake LLM.
+
+Run from backend/:
+    python -m benchmarks.bench_load --sizes 10,200 --concurrency 1,8,32 --json run.json
+    python -m benchmarks.bench_load --json new.json --compare run.json
+
+For each data size N a fresh server is started in a child process (uvicorn,
+temporary SQLite database, benchmarks.fake_llm.FakeModel in place of
+Gemini) and N projects are seeded for the benchmark user. Each scenario is
+then driven over HTTP at every concurrency level:
+
+- create:      POST /projects/ with --create-sections sections (LLM calls)
+- list:        GET /projects/?limit=20
+- get:         GET /projects/{id}
+- refine:      POST /sections/{id}/refine (one LLM call)
+- comment:     POST /sections/{id}/comments
+- export_docx: GET /export/docx/{id}
+- export_pptx: GET /export/pptx/{id}
+
+Reported per (size, concurrency, scenario): p50/p95/p99/mean latency,
+throughput (completed requests per second of wall time), errors, and the
+peak RSS of the server and its export workers during that scenario
+(Linux only: VmHWM, reset before each scenario via /proc/<pid>/clear_refs).
+LLM and export caches are off unless --warm-caches is given, so every
+request does the full work.
+
+--compare matches results by (size, concurrency, scenario) and flags a
+regression when p95 grows, or throughput drops, by more than --threshold;
+with --fail-on-regression the exit status is 1 if any were found.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCENARIOS = ("create", "list", "get", "refine", "comment", "export_docx", "export_pptx")
+
+PARAGRAPH = (
+    "Grid-scale storage changes how renewable generation is dispatched, and "
+    "the economics differ sharply between regions and market designs. "
+)
+
+
+# ---------- Server (child process) ----------
+
+def _serve(port: int, env: dict, latency: float, jitter: float, seed: int):
+    os.environ.update(env)
+    import uvicorn
+
+    from app.main import app
+    from app.services.llm_service import llm_service
+    from benchmarks.fake_llm import FakeModel
+
+    llm_service.model = FakeModel(latency=latency, jitter=jitter, seed=seed)
+    llm_service.model_name = "fake"
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_env(tmp: str, args) -> dict:
+    env = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "EXPORT_DIR": os.path.join(tmp, "exports"),
+        "LLM_MODEL_CACHE_PATH": os.path.join(tmp, "llm_model.json"),
+        # The fake model never throttles; neither should the client side
+        "LLM_RPM": "1000000",
+        "LLM_TPM": "1000000000",
+        "LLM_CACHE_ENABLED": str(args.warm_caches).lower(),
+        "EXPORT_CACHE_ENABLED": str(args.warm_caches).lower(),
+        "ASYNC_MODE": str(args.async_mode).lower(),
+    }
+    return env
+
+
+def _process_tree(pid: int) -> list:
+    """The server and its children (the export process pool)."""
+    pids = [pid]
+    try:
+        # Children are listed per thread; the pool is started from a request thread
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                for child in f.read().split():
+                    pids.extend(_process_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def _peak_rss_mb(pid: int):
+    """Sum of VmHWM over the server's process tree, in MB (None off Linux)."""
+    total = None
+    for p in _process_tree(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total = (total or 0) + int(line.split()[1])  # kB
+        except OSError:
+            pass
+    return round(total / 1024, 1) if total is not None else None
+
+
+def _reset_peak_rss(pid: int):
+    for p in _process_tree(pid):
+        try:
+            with open(f"/proc/{p}/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+
+
+# ---------- Data ----------
+
+def _seed(db_url: str, owner_id: int, n_projects: int, n_sections: int):
+    """N projects of n_sections sections (two comments each) for the benchmark user."""
+    from sqlalchemy import create_engine, func, select
+
+    from app import models
+
+    engine = create_engine(db_url)
+    with engine.begin() as conn:
+        first = (conn.execute(select(func.max(models.Project.id))).scalar() or 0) + 1
+        first_section = (conn.execute(select(func.max(models.Section.id))).scalar() or 0) + 1
+        project_ids = list(range(first, first + n_projects))
+        conn.execute(
+            models.Project.__table__.insert(),
+            [
+                {
+                    "id": p,
+                    "owner_id": owner_id,
+                    "name": f"Seeded {p}",
+                    "document_type": "docx" if p % 2 else "pptx",
+                    "main_topic": "Energy storage",
+                }
+                for p in project_ids
+            ],
+        )
+        sections = [
+            {
+                "id": first_section + i * n_sections + j,
+                "project_id": p,
+                "order_index": j,
+                "title": f"Section {j}",
+                "content": PARAGRAPH * 8,
+            }
+            for i, p in enumerate(project_ids)
+            for j in range(n_sections)
+        ]
+        conn.execute(models.Section.__table__.insert(), sections)
+        conn.execute(
+            models.Comment.__table__.insert(),
+            [{"section_id": s["id"], "text": f"Comment {c}"} for s in sections for c in range(2)],
+        )
+    engine.dispose()
+    return project_ids, [s["id"] for s in sections]
+
+
+# ---------- Load generation ----------
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _request_for(scenario: str, i: int, rng: random.Random, project_ids, section_ids, create_sections: int):
+    if scenario == "create":
+        body = {
+            "name": f"Bench {i}",
+            "document_type": "docx",
+            "main_topic": f"Energy storage {i}",
+            "sections": [{"order_index": j, "title": f"Part {j}"} for j in range(create_sections)],
+        }
+        return "POST", "/projects/", body
+    if scenario == "list":
+        return "GET", "/projects/?limit=20", None
+    if scenario == "get":
+        return "GET", f"/projects/{rng.choice(project_ids)}", None
+    if scenario == "refine":
+        return "POST", f"/sections/{rng.choice(section_ids)}/refine", {"prompt": f"Make it clearer ({i})"}
+    if scenario == "comment":
+        return "POST", f"/sections/{rng.choice(section_ids)}/comments", {"text": f"Load comment {i}"}
+    fmt = scenario.split("_")[1]
+    return "GET", f"/export/{fmt}/{rng.choice(project_ids)}", None
+
+
+async def _run_scenario(client, scenario, concurrency, n_requests, project_ids, section_ids, args):
+    rng = random.Random(args.seed)
+    plan = [
+        _request_for(scenario, i, rng, project_ids, section_ids, args.create_sections)
+        for i in range(n_requests)
+    ]
+    latencies, errors = [], 0
+    queue = iter(plan)
+
+    async def worker():
+        nonlocal errors
+        for method, url, body in queue:
+            start = time.perf_counter()
+            try:
+                r = await client.request(method, url, json=body)
+                await r.aread()
+                ok = r.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    return {
+        "requests": len(lat),
+        "errors": errors,
+        "p50_ms": round(_percentile(lat, 0.50), 2),
+        "p95_ms": round(_percentile(lat, 0.95), 2),
+        "p99_ms": round(_percentile(lat, 0.99), 2),
+        "mean_ms": round(statistics.fmean(lat), 2) if lat else 0.0,
+        "throughput_rps": round(len(lat) / wall, 2) if wall else 0.0,
+    }
+
+
+async def _drive(base_url, pid, size, project_ids, section_ids, token, args):
+    import httpx
+
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120) as client:
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                n = args.requests if not scenario.startswith("export") else max(1, args.requests // 2)
+                _reset_peak_rss(pid)
+                stats = await _run_scenario(client, scenario, concurrency, n, project_ids, section_ids, args)
+                row = {
+                    "size": size,
+                    "concurrency": concurrency,
+                    "scenario": scenario,
+                    **stats,
+                    "peak_rss_mb": _peak_rss_mb(pid),
+                }
+                results.append(row)
+                print(
+                    f"N={size:<6} c={concurrency:<4} {scenario:<12} "
+                    f"p50 {row['p50_ms']:>8.1f}ms  p95 {row['p95_ms']:>8.1f}ms  p99 {row['p99_ms']:>8.1f}ms  "
+                    f"{row['throughput_rps']:>8.1f} req/s  err {row['errors']}"
+                    + (f"  rss {row['peak_rss_mb']}MB" if row["peak_rss_mb"] is not None else "")
+                )
+    return results
+
+
+def _wait_ready(base_url: str, proc, timeout: float = 30.0):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if not proc.is_alive():
+            raise RuntimeError("benchmark server exited during startup")
+        try:
+            if httpx.get(base_url + "/llm/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("benchmark server did not become ready")
+
+
+def run_size(size: int, args) -> list:
+    import httpx
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _server_env(tmp, args)
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        ctx = multiprocessing.get_context("spawn")
+        proc = ctx.Process(target=_serve, args=(port, env, args.latency, args.jitter, args.seed))
+        proc.start()
+        try:
+            _wait_ready(base_url, proc)
+            creds = {"email": "load@bench", "password": "bench"}
+            user = httpx.post(base_url + "/auth/register", json=creds).json()
+            token = httpx.post(
+                base_url + "/auth/login", data={"username": creds["email"], "password": creds["password"]}
+            ).json()["access_token"]
+            project_ids, section_ids = _seed(env["DATABASE_URL"], user["id"], size, args.sections)
+            return asyncio.run(_drive(base_url, proc.pid, size, project_ids, section_ids, token, args))
+        finally:
+            tree = _process_tree(proc.pid)
+            proc.terminate()
+            proc.join(10)
+            # Don't leave render workers behind if the server didn't reap them
+            for pid in tree[1:]:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+
+
+# ---------- Comparison ----------
+
+def compare(old: dict, new: dict, threshold: float) -> list:
+    """Rows of new whose p95 or throughput is worse than old by more than `threshold`."""
+    key = lambda r: (r["size"], r["concurrency"], r["scenario"])  # noqa: E731
+    baseline = {key(r): r for r in old["results"]}
+    regressions = []
+    for row in new["results"]:
+        before = baseline.get(key(row))
+        if before is None:
+            continue
+        p95_ratio = row["p95_ms"] / before["p95_ms"] if before["p95_ms"] else 1.0
+        rps_ratio = row["throughput_rps"] / before["throughput_rps"] if before["throughput_rps"] else 1.0
+        worse = p95_ratio > 1 + threshold or rps_ratio < 1 / (1 + threshold)
+        print(
+            f"{'REGRESSION' if worse else 'ok':<10} N={row['size']:<6} c={row['concurrency']:<4} {row['scenario']:<12} "
+            f"p95 {before['p95_ms']:.1f} -> {row['p95_ms']:.1f}ms ({p95_ratio:.2f}x)  "
+            f"rps {before['throughput_rps']:.1f} -> {row['throughput_rps']:.1f} ({rps_ratio:.2f}x)"
+        )
+        if worse:
+            regressions.append(row)
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ints(value: str):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=_ints, default=[10, 200], help="seeded projects per run, e.g. 10,200")
+    parser.add_argument("--concurrency", type=_ints, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario and level (half for exports)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--sections", type=int, default=8, help="sections per seeded project")
+    parser.add_argument("--create-sections", type=int, default=5, help="sections per created project")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="fake LLM latency jitter (±), seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--async-mode", action="store_true", help="run the server with ASYNC_MODE=true")
+    parser.add_argument("--warm-caches", action="store_true", help="keep the LLM and export caches on")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        },
+        "results": [],
+    }
+    for size in args.sizes:
+        report["results"].extend(run_size(size, args))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# backend/benchmarks/bench_outline.py
+"""
+Section generation for new projects: one prompt per section vs. batched outline prompts.
+
+Run from backend/:
+    python -m benchmarks.bench_outline --sections 5,10,20 --concurrency 1,8 --json out.json
+    python -m benchmarks.bench_outline --latency 0.4 --per-word 0.005 --drop 0.1 --async
+
+Both modes go through LLMService.generate_sections() (or
+agenerate_sections() with --async) in-process, with
+benchmarks.fake_llm.FakeModel in place of Gemini. The LLM cache is off, so
+every outline pays for its model calls; the rate limiter is wide open
+unless --rpm sets a requests-per-minute budget (calls then queue for it,
+as they would against a real Gemini quota, starting from an empty burst).
+
+The fake model's latency is `--latency` per call plus `--per-word` per
+word of output, so a batched reply takes longer than a single section.
+
+- per_section: llm_outline_mode = "per_section", up to
+               --max-concurrency calls per outline in parallel
+- batched:     llm_outline_mode = "batched" with --batch-size sections per
+               JSON request; --drop of the sections in each reply are left
+               out or garbled and regenerated one by one
+
+Reported per (mode, sections, concurrency): p50/p95 latency of one outline,
+outlines per second of wall time, model calls per outline, and estimated
+prompt/output tokens per outline (~4 chars/token, as the rate limiter
+budgets them).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.services.llm_service import llm_service
+from app.services.rate_limit import RateLimiter, TokenBucket
+from benchmarks.fake_llm import FakeModel
+
+MODES = ["per_section", "batched"]
+TOPIC = "Community solar programs for mid-sized cities"
+
+
+def _ints(value: str):
+    return [int(v) for v in value.split(",") if v]
+
+
+def _titles(n: int):
+    return [f"Section {i + 1}: aspect {i + 1} of the topic" for i in range(n)]
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _one(mode: str, titles, args) -> float:
+    start = time.perf_counter()
+    if args.use_async:
+        texts = asyncio.run(llm_service.agenerate_sections(TOPIC, titles, mode=mode))
+    else:
+        texts = llm_service.generate_sections(TOPIC, titles, mode=mode)
+    elapsed = time.perf_counter() - start
+    assert len(texts) == len(titles) and all(texts)
+    return elapsed
+
+
+def run(mode: str, sections: int, concurrency: int, args) -> dict:
+    model = FakeModel(
+        latency=args.latency, jitter=args.jitter, words=args.words,
+        seed=args.seed, per_word=args.per_word, drop=args.drop,
+    )
+    llm_service.model = model
+    # rpm=0 disables the buckets; a one-call burst keeps a short run at the steady-state rate
+    llm_service.limiter = RateLimiter(rpm=args.rpm, tpm=0)
+    if args.rpm:
+        llm_service.limiter.requests = TokenBucket(args.rpm, capacity=1)
+    llm_service.model_name = "fake"
+    settings.llm_outline_batch_size = args.batch_size
+    settings.llm_max_concurrency = args.max_concurrency
+
+    # Outline i gets its own titles, so single-flight never merges two outlines
+    outlines = [[f"{t} (#{i})" for t in _titles(sections)] for i in range(args.outlines)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda titles: _one(mode, titles, args), outlines))
+    wall = time.perf_counter() - start
+
+    row = {
+        "mode": mode,
+        "sections": sections,
+        "concurrency": concurrency,
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "outlines_per_s": round(len(outlines) / wall, 2),
+        "calls_per_outline": round(model.calls / len(outlines), 2),
+        "prompt_tokens_per_outline": round(model.prompt_chars / 4 / len(outlines)),
+        "output_tokens_per_outline": round(model.output_chars / 4 / len(outlines)),
+    }
+    print(
+        f"{mode:<12} sections={sections:<3} c={concurrency:<3} "
+        f"p50={row['p50_ms']:>8.1f}ms p95={row['p95_ms']:>8.1f}ms "
+        f"{row['outlines_per_s']:>7.2f}/s calls={row['calls_per_outline']:>5.2f} "
+        f"prompt_tok={row['prompt_tokens_per_outline']:>6} output_tok={row['output_tokens_per_outline']:>6}"
+    )
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sections", type=_ints, default=[5, 10, 20], help="sections per outline, e.g. 5,10,20")
+    parser.add_argument("--concurrency", type=_ints, default=[1, 8], help="outlines generated at once")
+    parser.add_argument("--outlines", type=int, default=16, help="outlines per mode and level")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--batch-size", type=int, default=settings.llm_outline_batch_size)
+    parser.add_argument("--max-concurrency", type=int, default=settings.llm_max_concurrency,
+                        help="LLM calls in parallel within one outline")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM latency per call, seconds")
+    parser.add_argument("--per-word", type=float, default=0.002, help="fake LLM latency per output word, seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="fake LLM latency jitter (±), seconds")
+    parser.add_argument("--words", type=int, default=150, help="words per generated section")
+    parser.add_argument("--drop", type=float, default=0.0, help="fraction of batched sections missing/garbled")
+    parser.add_argument("--rpm", type=int, default=0, help="LLM requests per minute (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use agenerate_sections()")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    args.modes = [m for m in args.modes.split(",") if m]
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    llm_service.cache = None
+    settings.llm_rate_limit_wait_seconds = 3600.0
+
+    results = []
+    for sections in args.sections:
+        for concurrency in args.concurrency:
+            for mode in args.modes:
+                results.append(run(mode, sections, concurrency, args))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# backend/benchmarks/bench_search.py
+"""
+GET /search latency vs. database size: the FTS5 index against the LIKE fallback.
+
+Run from backend/:
+    python -m benchmarks.bench_search --sizes 10000,100000,300000 --json out.json
+
+For each size N (number of sections, plus N/2 comments), a temporary SQLite
+database is filled with generated text, indexed (migration 0005) and
+queried for random words as random owners. FTS5 stays in the low
+milliseconds except for words found in most rows (bm25 weighs each term
+over the whole index); LIKE scans every row of the owner's projects, so
+its cost grows with the tenant (--projects-per-user).
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import Base, make_engine
+from app.migrations import run_migrations
+from app.services import search
+from app.services.search import SearchIndex
+
+SECTIONS_PER_PROJECT = 10
+VOCABULARY = 5000
+WORDS_PER_SECTION = 120
+
+
+def _vocabulary(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(VOCABULARY)]
+
+
+def _text(rng, vocab, n):
+    # Zipf-ish: a few words are common, most are rare, like real prose
+    return " ".join(vocab[min(int(rng.paretovariate(1.1)) - 1, VOCABULARY - 1)] for _ in range(n))
+
+
+def _fill(engine, n_sections, projects_per_user, rng, vocab):
+    n_projects = max(1, n_sections // SECTIONS_PER_PROJECT)
+    n_users = max(1, n_projects // projects_per_user)
+
+    with engine.begin() as conn:
+        conn.execute(
+            models.User.__table__.insert(),
+            [{"id": u, "email": f"user{u}@bench", "hashed_password": "x"} for u in range(1, n_users + 1)],
+        )
+        conn.execute(
+            models.Project.__table__.insert(),
+            [
+                {
+                    "id": p,
+                    "owner_id": (p % n_users) + 1,
+                    "name": f"Project {p}",
+                    "document_type": "docx",
+                    "main_topic": _text(rng, vocab, 4),
+                }
+                for p in range(1, n_projects + 1)
+            ],
+        )
+        conn.execute(
+            models.Section.__table__.insert(),
+            [
+                {
+                    "id": s,
+                    "project_id": ((s - 1) % n_projects) + 1,
+                    "order_index": (s - 1) // n_projects,
+                    "title": _text(rng, vocab, 3),
+                    "content": _text(rng, vocab, WORDS_PER_SECTION),
+                }
+                for s in range(1, n_sections + 1)
+            ],
+        )
+        conn.execute(
+            models.Comment.__table__.insert(),
+            [
+                {"section_id": rng.randint(1, n_sections), "text": _text(rng, vocab, 12)}
+                for _ in range(n_sections // 2)
+            ],
+        )
+
+        start = time.perf_counter()
+        search.rebuild(conn)
+        index_seconds = time.perf_counter() - start
+    return n_users, index_seconds
+
+
+# Query words by frequency rank in the generated text: "common" ones occur
+# in most sections (worst case for ranking), "rare" ones in a handful.
+QUERY_CLASSES = {
+    "common": (0, 10),
+    "mid": (10, 100),
+    "rare": (100, VOCABULARY),
+}
+
+
+def _time(engine, index, n_users, rng, vocab, repeats, force_like):
+    results = {}
+    with Session(engine) as db:
+        if force_like:
+            index._enabled[engine] = False
+        for name, (lo, hi) in QUERY_CLASSES.items():
+            samples = []
+            for _ in range(repeats):
+                words = [vocab[rng.randrange(lo, hi)] for _ in range(rng.choice((1, 1, 2)))]
+                start = time.perf_counter()
+                index.search(db, rng.randint(1, n_users), " ".join(words), limit=20)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            results[name] = {
+                "p50_ms": round(statistics.median(samples), 3),
+                "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+            }
+    return results
+
+
+def run(sizes, repeats, projects_per_user, with_like):
+    rng = random.Random(42)
+    vocab = _vocabulary(rng)
+    report = []
+    for n_sections in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            run_migrations(engine)
+            n_users, index_seconds = _fill(engine, n_sections, projects_per_user, rng, vocab)
+
+            entry = {
+                "sections": n_sections,
+                "sections_per_user": n_sections // n_users,
+                "index_build_seconds": round(index_seconds, 2),
+                "fts5": _time(engine, SearchIndex(), n_users, rng, vocab, repeats, False),
+            }
+            if with_like:
+                entry["like"] = _time(engine, SearchIndex(), n_users, rng, vocab, repeats, True)
+            engine.dispose()
+
+        report.append(entry)
+        print(f"{n_sections:>8} sections ({entry['sections_per_user']}/user)  "
+              f"index build {entry['index_build_seconds']}s")
+        for engine_name in ("fts5", "like") if with_like else ("fts5",):
+            print(f"    {engine_name:<5} " + "  ".join(
+                f"{cls}: p50={t['p50_ms']}ms p95={t['p95_ms']}ms" for cls, t in entry[engine_name].items()
+            ))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,300000")
+    parser.add_argument("--repeats", type=int, default=300)
+    parser.add_argument("--projects-per-user", type=int, default=20,
+                        help="tenant size; LIKE cost grows with it, FTS5 barely does")
+    parser.add_argument("--no-like", action="store_true", help="skip timing the LIKE fallback")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = run(
+        [int(s) for s in args.sizes.split(",")],
+        args.repeats,
+        args.projects_per_user,
+        not args.no_like,
+    )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
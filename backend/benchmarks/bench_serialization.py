@@ -0,0 +1,190 @@
+# backend/benchmarks/bench_serialization.py
+"""
+CPU per GET /projects/ response: Pydantic validation vs. the dict + orjson path.
+
+Run from backend/:
+    python -m benchmarks.bench_serialization --projects 20 --sections 10 --json out.json
+
+A temporary SQLite database is filled with one user's projects. Every
+variant is timed with time.process_time() (CPU, not wall clock):
+
+- pydantic:     the previous route body, ProjectOut.model_validate() per
+                project and then FastAPI's response_model validation + JSON
+                dump of the whole list
+- fast:         serializers.dump_many() + orjson, same full document
+- fast_summary: fields=sections.title&include=sections (no content/comments)
+
+"serialize_ms" times encoding only (rows already loaded); "request_ms"
+includes the query with the matching loader options. Response sizes are
+reported raw, gzipped and brotli-compressed.
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Union
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, selectinload
+
+from app import models, schemas
+from app.database import Base, make_engine
+from app.middleware import HAS_BROTLI
+from app.migrations import run_migrations
+from app.services import serializers
+
+PARAGRAPH = (
+    "Renewable energy adoption depends on storage costs, grid interconnection "
+    "queues and permitting timelines, which vary widely between regions. "
+)
+
+LIST_ADAPTER = TypeAdapter(Union[List[schemas.ProjectOut], List[schemas.ProjectSummary]])
+
+
+def _fill(engine, n_projects, n_sections, n_comments):
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [{"id": 1, "email": "bench@x", "hashed_password": "x"}])
+        conn.execute(
+            models.Project.__table__.insert(),
+            [
+                {"id": p, "owner_id": 1, "name": f"Project {p}", "document_type": "docx", "main_topic": "Energy"}
+                for p in range(1, n_projects + 1)
+            ],
+        )
+        sections = [
+            {
+                "id": (p - 1) * n_sections + i + 1,
+                "project_id": p,
+                "order_index": i,
+                "title": f"Section {i}",
+                "content": PARAGRAPH * 12,
+            }
+            for p in range(1, n_projects + 1)
+            for i in range(n_sections)
+        ]
+        conn.execute(models.Section.__table__.insert(), sections)
+        conn.execute(
+            models.Comment.__table__.insert(),
+            [{"section_id": s["id"], "text": f"Comment {c} on {s['title']}"} for s in sections for c in range(n_comments)],
+        )
+
+
+def _query_full(db):
+    return (
+        db.query(models.Project)
+        .filter(models.Project.owner_id == 1)
+        .order_by(models.Project.id)
+        .options(selectinload(models.Project.sections).selectinload(models.Section.comments))
+        .all()
+    )
+
+
+def _query_selection(db, selection):
+    return (
+        db.query(models.Project)
+        .filter(models.Project.owner_id == 1)
+        .order_by(models.Project.id)
+        .options(*serializers.loader_options(selection))
+        .all()
+    )
+
+
+def _serialize_pydantic(projects) -> bytes:
+    validated = [schemas.ProjectOut.model_validate(p) for p in projects]
+    return LIST_ADAPTER.dump_json(LIST_ADAPTER.validate_python(validated))
+
+
+def _cpu_ms(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.process_time()
+        fn()
+        samples.append((time.process_time() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def _sizes(body: bytes):
+    sizes = {"raw_bytes": len(body), "gzip_bytes": len(gzip.compress(body, 6))}
+    if HAS_BROTLI:
+        import brotli
+
+        sizes["brotli_bytes"] = len(brotli.compress(body, quality=4))
+    return sizes
+
+
+def run(n_projects, n_sections, n_comments, repeats):
+    full = serializers.parse_selection("project", None, None)
+    summary = serializers.parse_selection("project", "sections.title", "sections")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        _fill(engine, n_projects, n_sections, n_comments)
+
+        report = {"projects": n_projects, "sections_per_project": n_sections, "comments_per_section": n_comments}
+        with Session(engine) as db:
+            loaded_full = _query_full(db)
+            loaded_summary = _query_selection(db, summary)
+
+            variants = {
+                "pydantic": (
+                    lambda: _serialize_pydantic(loaded_full),
+                    lambda: _serialize_pydantic(_query_full(db)),
+                ),
+                "fast": (
+                    lambda: serializers.dumps(serializers.dump_many(loaded_full, full)),
+                    lambda: serializers.dumps(serializers.dump_many(_query_selection(db, full), full)),
+                ),
+                "fast_summary": (
+                    lambda: serializers.dumps(serializers.dump_many(loaded_summary, summary)),
+                    lambda: serializers.dumps(serializers.dump_many(_query_selection(db, summary), summary)),
+                ),
+            }
+            for name, (serialize, request) in variants.items():
+                body = serialize()
+                # Each request gets fresh objects, as a real request would
+                def fresh_request():
+                    db.expunge_all()
+                    request()
+                report[name] = {
+                    "serialize_ms": _cpu_ms(serialize, repeats),
+                    "request_ms": _cpu_ms(fresh_request, max(1, repeats // 5)),
+                    **_sizes(body),
+                }
+        engine.dispose()
+
+    assert json.loads(_serialize_pydantic(loaded_full)) == json.loads(
+        serializers.dumps(serializers.dump_many(loaded_full, full))
+    ), "fast path output differs from the Pydantic output"
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--comments", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.projects, args.sections, args.comments, args.repeats)
+    base = report["pydantic"]["serialize_ms"]
+    for name in ("pydantic", "fast", "fast_summary"):
+        r = report[name]
+        print(
+            f"{name:<13} serialize {r['serialize_ms']:>8.3f}ms ({base / r['serialize_ms']:.1f}x)  "
+            f"request {r['request_ms']:>8.3f}ms  body {r['raw_bytes']}B"
+            f" gzip {r['gzip_bytes']}B" + (f" br {r['brotli_bytes']}B" if "brotli_bytes" in r else "")
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# backend/benchmarks/fake_llm.py
+"""
+Deterministic stand-in for a google.generativeai GenerativeModel.
+
+Plug it into the app with
+
+    llm_service.model = FakeModel(latency=0.05, jitter=0.02)
+
+The response text depends only on the prompt and the seed, so two runs of a
+benchmark produce the same documents; only the simulated latency is random
+(uniform in latency ± jitter), plus `per_word` seconds for every word of
+output, the way a real model's time grows with the reply.
+
+Batched outline prompts (LLMService._outline_prompt) get a JSON reply with
+one entry per section; `drop` is the fraction of those entries left out or
+garbled, to exercise the per-section fallback.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import zlib
+
+WORDS = (
+    "adoption analysis baseline capacity constraints cost data demand deployment "
+    "design efficiency evidence framework growth impact infrastructure market "
+    "method model outcome policy process quality rate regional resource result "
+    "risk scale signal strategy supply system target timeline trend value"
+).split()
+
+
+# The numbered section list of a batched outline prompt
+OUTLINE_SECTIONS = re.compile(r"^Sections:\n((?:\d+\. .*\n?)+)", re.MULTILINE)
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        words: int = 150,
+        seed: int = 0,
+        per_word: float = 0.0,
+        drop: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.words = words
+        self.seed = seed
+        self.per_word = per_word
+        self.drop = drop
+        self.calls = 0
+        self.prompt_chars = 0
+        self.output_chars = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self, prompt: str, text: str) -> float:
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+            self.output_chars += len(text)
+            jitter = self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency + jitter + self.per_word * len(text.split()))
+
+    def text_for(self, prompt: str) -> str:
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed)
+        sentences = []
+        for _ in range(max(1, self.words // 10)):
+            words = [rng.choice(WORDS) for _ in range(10)]
+            sentences.append(" ".join(words).capitalize() + ".")
+        # Paragraphs of four sentences, like a real section
+        return "\n\n".join(" ".join(sentences[i:i + 4]) for i in range(0, len(sentences), 4))
+
+    def reply_for(self, prompt: str) -> str:
+        match = OUTLINE_SECTIONS.search(prompt)
+        if not match:
+            return self.text_for(prompt)
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed)
+        sections = {}
+        for line in match.group(1).splitlines():
+            number, title = line.split(". ", 1)
+            if rng.random() < self.drop:
+                # Half left out, half present but unusable
+                if rng.random() < 0.5:
+                    sections[number] = ""
+                continue
+            sections[number] = self.text_for(prompt.split("Sections:")[0] + title)
+        return "```json\n" + json.dumps(sections, ensure_ascii=False) + "\n```"
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        text = self.reply_for(prompt)
+        delay = self._delay(prompt, text)
+        if stream:
+            return self._stream(text, delay)
+        time.sleep(delay)
+        return FakeResponse(text)
+
+    async def generate_content_async(self, prompt: str):
+        text = self.reply_for(prompt)
+        await asyncio.sleep(self._delay(prompt, text))
+        return FakeResponse(text)
+
+    def _stream(self, text: str, delay: float):
+        chunks = text.split(" ")
+        step = delay / max(1, len(chunks))
+        for i, word in enumerate(chunks):
+            time.sleep(step)
+            yield FakeResponse(word if i == len(chunks) - 1 else word + " ")
@@ -0,0 +1,43 @@
+# backend/tests/conftest.py
+"""
+Shared setup for the backend tests.
+
+app.config.settings and the database engines are built once, on the first
+`import app...`, so the environment has to be set here, before pytest
+imports any test module: one temp directory holds the database and the
+exports for the whole run, Gemini is off (stub mode) and the on-disk LLM
+cache is disabled. Tests that need a model assign one of the fakes in
+tests/fakes.py to llm_service.model.
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["EXPORT_DIR"] = os.path.join(_tmp, "exports")
+os.environ["LLM_MODEL_CACHE_PATH"] = ""
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services.llm_service import llm_service  # noqa: E402
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        llm_service.model = None
+        llm_service.model_name = "test"
+        yield c
+    llm_service.model = None
+
+
+@pytest.fixture()
+def headers(client):
+    """Authorization headers for a freshly registered user."""
+    email = f"user-{os.urandom(4).hex()}@test"
+    client.post("/auth/register", json={"email": email, "password": "pw"})
+    token = client.post("/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,38 @@
+# backend/tests/fakes.py
+"""Stand-ins for the Gemini model, assigned to llm_service.model by tests."""
+
+
+class FakeResponse:
+    """A generate_content() result, or one chunk of a streamed one."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StreamingModel:
+    """Streams `chunks`, then raises `error` if one is given."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    def generate_content(self, prompt, stream=False):
+        def gen():
+            for text in self.chunks:
+                yield FakeResponse(text)
+            if self.error is not None:
+                raise self.error
+        return gen()
+
+
+class SelectiveModel:
+    """Answers every prompt with `text`, except those containing `fail_on`."""
+
+    def __init__(self, fail_on, text="Generated text."):
+        self.fail_on = fail_on
+        self.text = text
+
+    def generate_content(self, prompt, stream=False):
+        if self.fail_on in prompt:
+            raise ValueError("bad request")
+        return FakeResponse(self.text)
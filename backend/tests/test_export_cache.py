@@ -0,0 +1,44 @@
+# backend/tests/test_export_cache.py
+"""
+ExportCache.evict() may only remove files the cache wrote itself; the
+export directory is shared with hand-made and git-tracked exports.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import os
+
+from app.services.export_cache import ExportCache
+
+KEY = "a" * 64
+
+
+def _touch(directory, name, mtime=0):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * 10)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_evict_only_removes_cache_files(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=0, max_age_seconds=0)
+    foreign = ["project_1.docx", "project_1.pptx", "notes.txt", f"{KEY}.pdf", f"{KEY.upper()}.docx"]
+    for name in foreign:
+        _touch(tmp_path, name)
+    _touch(tmp_path, f"{KEY}.docx")
+    _touch(tmp_path, f".{KEY}.x1y2z3.pptx.tmp")
+
+    cache.evict()
+
+    assert sorted(os.listdir(tmp_path)) == sorted(foreign)
+
+
+def test_put_keeps_fresh_files_within_budget(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1024, max_age_seconds=3600)
+    _touch(tmp_path, "project_2.docx")
+
+    path = cache.put(KEY, "docx", b"data")
+
+    assert cache.get(KEY, "docx") == path
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{KEY}.docx", "project_2.docx"])
@@ -0,0 +1,58 @@
+# backend/tests/test_feedback.py
+"""
+Buffered votes stay in FeedbackBuffer.pending() until the flush that
+writes them has committed, so POST /sections/{id}/feedback never reports
+counts missing a vote that is between the buffer and the database.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+from app import models
+from app.database import SessionLocal
+from app.services.feedback import FeedbackBuffer
+
+
+def _likes(section_id):
+    with SessionLocal() as db:
+        return db.get(models.Section, section_id).likes or 0
+
+
+def test_votes_being_written_still_count_as_pending(client, headers):
+    project = client.post("/projects/", json={
+        "name": "p", "document_type": "docx", "main_topic": "Topic",
+        "sections": [{"title": "A", "order_index": 0}],
+    }, headers=headers).json()
+    section_id = project["sections"][0]["id"]
+
+    buffer = FeedbackBuffer(interval=60, max_pending=100)
+    buffer.record(section_id, True)
+    buffer.record(section_id, True)
+    buffer.record(section_id, False)
+
+    seen = []
+    write = buffer._write
+
+    def observed_write(deltas, events):
+        seen.append(buffer.pending(section_id))
+        write(deltas, events)
+
+    buffer._write = observed_write
+    assert buffer.flush() == 3
+
+    assert seen == [(2, 1)]
+    assert buffer.pending(section_id) == (0, 0)
+    assert _likes(section_id) == 2
+
+
+def test_feedback_route_counts_the_vote(client, headers):
+    project = client.post("/projects/", json={
+        "name": "p", "document_type": "docx", "main_topic": "Topic",
+        "sections": [{"title": "A", "order_index": 0}],
+    }, headers=headers).json()
+    section_id = project["sections"][0]["id"]
+
+    first = client.post(f"/sections/{section_id}/feedback", json={"is_like": True}, headers=headers)
+    second = client.post(f"/sections/{section_id}/feedback", json={"is_like": False}, headers=headers)
+
+    assert first.status_code == 200
+    assert (second.json()["likes"], second.json()["dislikes"]) == (1, 1)
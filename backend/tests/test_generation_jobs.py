@@ -0,0 +1,60 @@
+# backend/tests/test_generation_jobs.py
+"""
+Background generation jobs (POST /projects/async) must report a section
+whose Gemini call failed as `failed`, with the error, instead of counting
+the fallback text as a finished section.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import os
+import time
+
+import pytest
+from fakes import SelectiveModel
+
+from app.services.llm_service import llm_service
+
+
+def _run_job(client, headers, titles):
+    job = client.post("/projects/async", json={
+        "name": "p", "document_type": "docx", "main_topic": f"Topic {os.urandom(4).hex()}",
+        "sections": [{"title": t, "order_index": i} for i, t in enumerate(titles)],
+    }, headers=headers)
+    assert job.status_code == 202, job.text
+    job_id = job.json()["id"]
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        status = client.get(f"/projects/jobs/{job_id}", headers=headers).json()
+        if status["status"] == "done":
+            return status
+        time.sleep(0.05)
+    pytest.fail(f"job {job_id} did not finish: {status}")
+
+
+def test_failed_generation_is_reported(client, headers):
+    llm_service.model = SelectiveModel(fail_on="Broken section")
+
+    status = _run_job(client, headers, ["Fine section", "Broken section"])
+
+    assert status["completed"] == 2
+    assert status["failed"] == 1
+    fine, broken = status["tasks"]
+    assert fine["status"] == "done" and fine["error"] is None
+    assert broken["status"] == "failed"
+    assert broken["attempts"] == 1
+    assert "bad request" in broken["error"]
+
+    project = client.get(f"/projects/{status['project_id']}", headers=headers).json()
+    contents = [s["content"] for s in project["sections"]]
+    assert contents[0] == "Generated text."
+    # The failed section still gets the readable fallback text
+    assert contents[1]
+
+
+def test_stub_mode_is_not_a_failure(client, headers):
+    status = _run_job(client, headers, ["Only section"])
+
+    assert status["failed"] == 0
+    assert status["tasks"][0]["status"] == "done"
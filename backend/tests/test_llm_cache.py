@@ -0,0 +1,34 @@
+# backend/tests/test_llm_cache.py
+"""
+The SQLite tier of LLMCache stays bounded: expired rows and the
+soonest-expiring ones past disk_max_entries are pruned as it is written to.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+from app.services.llm_cache import LLMCache
+
+
+def test_disk_tier_is_capped(tmp_path):
+    cache = LLMCache(
+        max_entries=4, db_path=str(tmp_path / "llm_cache.db"),
+        disk_max_entries=20, disk_prune_every=10,
+    )
+    for i in range(100):
+        cache.set(f"key-{i}", "text " * 100)
+
+    stats = cache.stats()
+    assert stats["disk_entries"] == 20
+    assert stats["disk_pruned"] == 80
+    assert stats["disk_bytes"] > 0
+    # The newest rows are the ones kept
+    assert cache._disk_get("key-99", 0) is not None
+    assert cache._disk_get("key-0", 0) is None
+
+
+def test_expired_rows_are_deleted(tmp_path):
+    cache = LLMCache(ttl_seconds=-1, db_path=str(tmp_path / "llm_cache.db"), disk_prune_every=5)
+    for i in range(5):
+        cache.set(f"key-{i}", "stale")
+
+    assert cache.stats()["disk_entries"] == 0
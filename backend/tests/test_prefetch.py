@@ -0,0 +1,55 @@
+# backend/tests/test_prefetch.py
+"""
+Preset prefetch is queued by real reads only: an ETag poll answered with
+304 must not schedule anything (nor query the project's sections).
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import pytest
+
+from app.services.prefetch import refine_prefetcher
+
+
+@pytest.fixture()
+def prefetch_on(client):
+    refine_prefetcher.enabled = True
+    refine_prefetcher.start()
+    yield refine_prefetcher
+    refine_prefetcher.stop()
+    refine_prefetcher.enabled = False
+
+
+@pytest.fixture()
+def project(client, headers):
+    return client.post("/projects/", json={
+        "name": "p", "document_type": "docx", "main_topic": "Topic",
+        "sections": [{"title": "A", "order_index": 0}, {"title": "B", "order_index": 1}],
+    }, headers=headers).json()
+
+
+def _scheduled():
+    return refine_prefetcher.stats()["scheduled"]
+
+
+def test_project_etag_poll_does_not_schedule(client, headers, project, prefetch_on):
+    before = _scheduled()
+    first = client.get(f"/projects/{project['id']}", headers=headers)
+    assert first.status_code == 200
+    assert _scheduled() == before + 2
+
+    poll = client.get(f"/projects/{project['id']}", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert poll.status_code == 304
+    assert _scheduled() == before + 2
+
+
+def test_section_etag_poll_does_not_schedule(client, headers, project, prefetch_on):
+    section_id = project["sections"][0]["id"]
+    before = _scheduled()
+    first = client.get(f"/sections/{section_id}", headers=headers)
+    assert first.status_code == 200
+    assert _scheduled() == before + 1
+
+    poll = client.get(f"/sections/{section_id}", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert poll.status_code == 304
+    assert _scheduled() == before + 1
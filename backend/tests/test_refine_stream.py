@@ -0,0 +1,70 @@
+# backend/tests/test_refine_stream.py
+"""
+POST /sections/{id}/refine/stream must only save a refinement that
+streamed to the end; a Gemini failure partway through sends an `error`
+event and leaves the section as it was.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import pytest
+from fakes import StreamingModel
+
+from app import models
+from app.database import SessionLocal
+from app.services.llm_service import llm_service
+
+ORIGINAL = "Original paragraph. " * 60
+
+
+@pytest.fixture()
+def section(client, headers):
+    project = client.post("/projects/", json={
+        "name": "p", "document_type": "docx", "main_topic": "Topic",
+        "sections": [{"title": "A", "order_index": 0}],
+    }, headers=headers).json()
+    section_id = project["sections"][0]["id"]
+    with SessionLocal() as db:
+        db.get(models.Section, section_id).content = ORIGINAL
+        db.commit()
+    return section_id, headers
+
+
+def _stream(client, section_id, headers):
+    with client.stream(
+        "POST", f"/sections/{section_id}/refine/stream?use_cache=false",
+        json={"prompt": "Make it formal"}, headers=headers,
+    ) as response:
+        return response.status_code, "".join(response.iter_text())
+
+
+def _content(section_id):
+    with SessionLocal() as db:
+        return db.get(models.Section, section_id).content
+
+
+def test_mid_stream_failure_sends_error_and_saves_nothing(client, section):
+    section_id, headers = section
+    llm_service.model = StreamingModel(["Signal timeline ", "impact value signal"], ValueError("stream reset"))
+
+    status, body = _stream(client, section_id, headers)
+
+    assert status == 200
+    assert "event: token" in body
+    assert "event: error" in body
+    assert "event: done" not in body
+    assert _content(section_id) == ORIGINAL
+    history = client.get(f"/sections/{section_id}/history", headers=headers).json()
+    assert history["total"] == 0
+
+
+def test_completed_stream_is_saved(client, section):
+    section_id, headers = section
+    llm_service.model = StreamingModel(["Formal ", "text."])
+
+    status, body = _stream(client, section_id, headers)
+
+    assert status == 200
+    assert "event: done" in body
+    assert "event: error" not in body
+    assert _content(section_id) == "Formal text."
@@ -2,6 +2,15 @@
 import React, { useState } from "react";
 import CommentBox from "./CommentBox";
 
+// Keep in sync with REFINE_PRESETS on the backend, which can refine these
+// ahead of time so a click returns straight away
+const PRESETS = [
+  "Make it formal",
+  "Make it simpler",
+  "Make concise",
+  "Rewrite for beginners",
+];
+
 function SectionCard({ section, onRefine, onFeedback, onAddComment }) {
   const [prompt, setPrompt] = useState("");
   const [refining, setRefining] = useState(false);
@@ -14,6 +23,12 @@ function SectionCard({ section, onRefine, onFeedback, onAddComment }) {
     setRefining(false);
   };
 
+  const handlePresetClick = async (preset) => {
+    setRefining(true);
+    await onRefine(section.id, preset);
+    setRefining(false);
+  };
+
   const handleLike = () => onFeedback(section.id, true);
   const handleDislike = () => onFeedback(section.id, false);
 
@@ -41,6 +56,27 @@ function SectionCard({ section, onRefine, onFeedback, onAddComment }) {
         {section.content || "(No content yet)"}
       </pre>
 
+      <div style={{ marginTop: "8px", display: "flex", flexWrap: "wrap", gap: "6px" }}>
+        {PRESETS.map((preset) => (
+          <button
+            key={preset}
+            onClick={() => handlePresetClick(preset)}
+            disabled={refining}
+            style={{
+              padding: "4px 10px",
+              borderRadius: "999px",
+              border: "1px solid #c7d2fe",
+              background: "#eef2ff",
+              color: "#4338ca",
+              fontSize: "0.8rem",
+              cursor: "pointer",
+            }}
+          >
+            {preset}
+          </button>
+        ))}
+      </div>
+
       <div style={{ marginTop: "8px" }}>
         <label style={{ fontSize: "0.85rem" }}>
           Refinement prompt